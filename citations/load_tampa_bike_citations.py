@@ -1,15 +1,24 @@
 from __future__ import unicode_literals
 
+import collections
 import csv
 import datetime
+import functools
 import json
 import os
+import re
 import sys
 
-import requests
+import psycopg2
 from dateutil import parser
 from django.template.defaultfilters import slugify
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pipeline import (  # noqa: E402
+    CSVSink, PandaSink, PostgresCopySink, RepairedText, panda_get, panda_put,
+    parquet_rows, run_pipeline)
+from voters.names import normalize_name  # noqa: E402
+
 
 class RunVars:
     """Track runtime variables."""
@@ -20,17 +29,14 @@ class RunVars:
         self.updated = 0
         self.created = 0
         self.passed = 0
+        self.bad_dates = collections.Counter()  # unparseable, by column
 
 # panda params
 RUNVARS = RunVars()
 RUNVARS.starter = datetime.datetime.now()
+# (credentials, batching and retries are set in pipeline.panda)
 PANDA_BASE_URL = os.getenv('PANDA_BASE_URL')
-PANDA_AUTH_PARAMS = {
-    'email': os.getenv('PANDA_USER'),
-    'api_key': os.getenv('PANDA_API_KEY')
-}
 QUERY_LIMIT = 1200
-PANDA_BULK_UPDATE_SIZE = 1000
 PANDA_API = '%s/api/1.0' % PANDA_BASE_URL
 PANDA_ALL_DATA_URL = "%s/data/" % PANDA_API
 PANDA_DATASET_BASE = "%s/dataset" % PANDA_API
@@ -38,40 +44,121 @@ DATASET_NAME = "Tampa bicycle citations 2003 to 2014"
 DATASET_SLUG = slugify(DATASET_NAME)
 DATASET_URL = '{}/{}/'.format(PANDA_DATASET_BASE, DATASET_SLUG)
 DATA_URL = '{}data/'.format(DATASET_URL)
+OUTPUT_HEADINGS = [
+    'lname',
+    'fname',
+    'mname',
+    'suffix',
+    'DOB',
+    'race',
+    'gender',
+    'DL',
+    'address',
+    'date',
+    'statute',
+    'agency',
+    'officer',
+]
+POSTGRES_TABLE = 'citations_bikecitation'
+ADDRESS_COLUMNS = [
+    'Address Line 1', 'Address Line 2', 'City', 'State', 'Zip Code']
+# Fixed date formats tried before dateutil, with their year/month/day groups
+DATE_FORMATS = [
+    (re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})(?:[ T].*)?$'), (3, 1, 2)),
+    (re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})(?:[ T].*)?$'), (1, 2, 3)),
+]
+DATE_CACHE_SIZE = 1 << 16
+# A date whose year is given in two digits, such as 5/6/05
+TWO_DIGIT_YEAR = re.compile(r'\d{1,2}[/-]\d{1,2}[/-]\d{2}(?:[ T].*)?$')
+# Columns of a prepped voter load file, in order (LOAD_COLUMNS in
+# voters/load_county_voters.py); Parquet load files use the same names
+VOTER_LOAD_COLUMNS = [
+    'lname', 'fname', 'mname', 'suffix', 'addr1', 'addr2', 'city',
+    'zipcode', 'gender', 'race', 'birthdate', 'party', 'areacode', 'phone',
+    'email', 'exemption_requested', 'registration_date', 'active',
+    'voter_ID']
+VOTER_MATCH_COLUMNS = [
+    'voter_ID', 'lname', 'fname', 'mname', 'birthdate', 'addr1']
+MATCHES_CSV = 'citation_voter_matches.csv'
+MATCH_HEADINGS = [
+    'external_id', 'voter_id', 'score', 'match', 'lname', 'fname', 'DOB',
+    'voter_lname', 'voter_fname', 'voter_birthdate']
+# Base score for each way a citee's name and DOB can match a voter's:
+# the same last and first names, the two swapped, or the same last name
+# and first initial
+MATCH_SCORES = {'name': 0.9, 'swapped': 0.7, 'initial': 0.6}
+MIDDLE_INITIAL_AGREES = 0.05
+MIDDLE_INITIAL_CONFLICTS = -0.2
+ADDRESS_AGREES = 0.05
+Citee = collections.namedtuple(
+    'Citee', ['external_id', 'lname', 'fname', 'middle', 'dob', 'address'])
+
+
+@functools.lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_date(value):
+    """
+    Parse a date string, or return None if it isn't one.
+
+    The DATE_FORMATS are matched first, and dateutil only gets values
+    none of them fit. Results are cached, since dates repeat a lot.
+    """
+    value = value.strip()
+    if not value:
+        return None
+    for pattern, (year, month, day) in DATE_FORMATS:
+        match = pattern.match(value)
+        if match:
+            try:
+                return datetime.date(
+                    int(match.group(year)),
+                    int(match.group(month)),
+                    int(match.group(day)))
+            except ValueError:
+                return None
+    try:
+        return parser.parse(value).date()
+    except (ValueError, OverflowError):
+        return None
 
 
+@functools.lru_cache(maxsize=DATE_CACHE_SIZE)
 def parse_dob(value):
+    """
+    Parse a date of birth, or return None if it isn't one.
+
+    Two-digit years can land a century late (5/6/05 parses as 2005), so
+    those DOBs after the turn date go back 100 years. A four-digit year
+    is taken as given.
+    """
     turndate = datetime.date(2004, 1, 1)  # allow for any citees as young as 10
-    try:
-        dob = parser.parse(value.strip()).date()
-    except Exception as e:
-        print("Couldn't parse dob {} ({})".format(value, e))
+    dob = parse_date(value)
+    if dob is None or dob == datetime.date.today():
         return None
+    elif dob > turndate and TWO_DIGIT_YEAR.match(value.strip()):
+        return dob.replace(year=dob.year - 100)
     else:
-        if dob == datetime.date.today():
-            return None
-        elif dob > turndate:
-            return dob.replace(year=dob.year - 100)
-        else:
-            return dob
+        return dob
 
 
-def panda_get(url, params={}):
-    params.update(PANDA_AUTH_PARAMS)
-    return requests.get(url, params=params)
+def format_date(date):
+    """Return a date as MM/DD/YYYY, like the voter datasets' dates."""
+    return '{:02d}/{:02d}/{:04d}'.format(date.month, date.day, date.year)
 
 
-def panda_put(url, data, params={}):
-    params.update(PANDA_AUTH_PARAMS)
-    return requests.put(
-        url, data,
-        params=params,
-        headers={'Content-Type': 'application/json'})
-
+def normalize_date(row, column, parse=parse_date):
+    """
+    Return a row's date as MM/DD/YYYY, like the voter datasets' dates.
 
-def panda_delete(url, params={}):
-    params.update(PANDA_AUTH_PARAMS)
-    return requests.delete(url, params=params)
+    Values that can't be parsed are passed along as they are, and counted
+    in RUNVARS.bad_dates by column.
+    """
+    value = row[column]
+    parsed = parse(value)
+    if parsed is None:
+        if value.strip():
+            RUNVARS.bad_dates[column] += 1
+        return value
+    return format_date(parsed)
 
 
 """
@@ -118,16 +205,11 @@ RAW HEADINGS
  40: Offense Year
  41: Age
 
-NOTE: can clean up the BOM (byte order mark) character,
-and many other encoding poblems, with ftfy's fix_text function, like so:
-
-import ftfy
-bad_col = reader.fieldnames[0]
-bad_col
->> '\ufeffUniform Case Number'
-
-ftfy.fix_text(bad_col)
->> 'Uniform Case Number'
+NOTE: the source file starts with a BOM (byte order mark) character,
+which once left the first heading as '\ufeffUniform Case Number', and
+has other encoding problems here and there. load_tickets reads it through
+pipeline.RepairedText, which strips the BOM and repairs just the lines
+that need it, rather than running ftfy's fix_text on every value.
 
 desired-columns = '1,9,10,11,12,18,19,20,21,22,13,14,15,16,17,7,25,5,6'
 """
@@ -135,21 +217,6 @@ desired-columns = '1,9,10,11,12,18,19,20,21,22,13,14,15,16,17,7,25,5,6'
 
 def initialize_dataset():
     """Initiate a PANDA dataset for bicycle citations."""
-    output_headings = [
-        'lname',
-        'fname',
-        'mname',
-        'suffix',
-        'DOB',
-        'race',
-        'gender',
-        'DL',
-        'address',
-        'date',
-        'statute',
-        'agency',
-        'officer',
-    ]
     dataset_dict = {
         'name': DATASET_NAME,
         'description': (
@@ -166,7 +233,7 @@ def initialize_dataset():
         response = panda_put(
             DATASET_URL,
             json.dumps(dataset_dict),
-            params={'columns': ','.join(output_headings)}
+            params={'columns': ','.join(OUTPUT_HEADINGS)}
         )
         if response.status_code == 201:
             print("Created PANDA dataset {}".format(DATASET_NAME))
@@ -184,68 +251,255 @@ def initialize_dataset():
         return True
 
 
-def load_tickets(infile):
+def get_option(name, default=None):
+    """Return the value of a --name=value command-line option."""
+    prefix = '--{}='.format(name)
+    for arg in sys.argv[1:]:
+        if arg.startswith(prefix):
+            return arg[len(prefix):]
+    return default
+
+
+def ticket_record(row):
+    """Turn a raw citation row into an (external_id, data) record."""
+    RUNVARS.processed += 1
+    addr = ", ".join([row[key] for key in ADDRESS_COLUMNS if row[key]])
+    dl = "{} ({})".format(
+        row['Driver License Number'], row['Driver License State'])
+    return str(row['ID']), [
+        row['Last Name'],
+        row['First Name'],
+        row['Middle Name'],
+        row['Suffix'],
+        normalize_date(row, 'Date Of Birth', parse=parse_dob),
+        row['Race'].replace('White', 'Wh').replace('Black', 'Bl'),
+        row['Gender'],
+        dl,
+        addr,
+        normalize_date(row, 'Offense Date'),
+        row['Statute Description'],
+        row['Law Enf Agency Name'],
+        row['Law Enf Officer Name']
+    ]
+
+
+def flat_ticket_record(row):
+    """Return a ticket's record as one list, external_id first."""
+    external_id, data = ticket_record(row)
+    return [external_id] + data
+
+
+def load_tickets(infile, csv_path=None, postgres_db=None):
+    """
+    Load a citations CSV to PANDA, or to a local CSV or Postgres table.
+
+    With csv_path (--csv=PATH), records are written to that file; with
+    postgres_db (--postgres=DB), they replace the rows of POSTGRES_TABLE
+    in that database, in one transaction. Otherwise they go to the PANDA
+    dataset, which should already be initialized.
+    """
     if not os.path.isfile(infile):
         print("Couldn't find the source file '{}'".format(infile))
         return
-    address_rows = [
-        'Address Line 1', 'Address Line 2', 'City', 'State', 'Zip Code']
-    put_data = {'objects': []}
-    with open(infile, 'r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            RUNVARS.processed += 1
-            pk = row['ID']
-            addr = ", ".join([row[key] for key in address_rows if row[key]])
-            dl = "{} ({})".format(
-                row['Driver License Number'], row['Driver License State'])
-            put_data['objects'].append({
-                'external_id': str(pk),
-                'data': [
-                    row['Last Name'],
-                    row['First Name'],
-                    row['Middle Name'],
-                    row['Suffix'],
-                    row['Date Of Birth'],
-                    row['Race'].replace('White', 'Wh').replace(
-                        'Black', 'Bl'),
-                    row['Gender'],
-                    dl,
-                    addr,
-                    row['Offense Date'],
-                    row['Statute Description'],
-                    row['Law Enf Agency Name'],
-                    row['Law Enf Officer Name']
-                ]
-            })
-            if len(put_data['objects']) == 1000:
-                RUNVARS.created += 1000
-                print("Shipped {} rows".format(RUNVARS.created))
-                panda_put(DATA_URL, json.dumps(put_data))
-                put_data['objects'] = []
-    if put_data['objects']:
-        print('Shipping final {} rows.'.format(len(put_data['objects'])))
-        panda_put(DATA_URL, json.dumps(put_data))
-        RUNVARS.created += len(put_data['objects'])
-        put_data['objects'] = []
-    print("pushed {} rows to panda dataset {}; process took {}".format(
+    connection = None
+    transform = flat_ticket_record
+    if csv_path:
+        sink = CSVSink(csv_path, header=['external_id'] + OUTPUT_HEADINGS)
+        destination = csv_path
+    elif postgres_db:
+        connection = psycopg2.connect(
+            dbname=postgres_db, client_encoding='UTF8')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TABLE IF NOT EXISTS {} '
+                '(external_id text PRIMARY KEY, {})'.format(
+                    POSTGRES_TABLE,
+                    ', '.join(
+                        '"{}" text'.format(col) for col in OUTPUT_HEADINGS)))
+            cursor.execute('TRUNCATE {}'.format(POSTGRES_TABLE))
+        sink = PostgresCopySink(
+            connection, POSTGRES_TABLE,
+            ['external_id'] + ['"{}"'.format(h) for h in OUTPUT_HEADINGS])
+        destination = '{} in {}'.format(POSTGRES_TABLE, postgres_db)
+    else:
+        sink = PandaSink(DATA_URL)
+        transform = ticket_record
+        destination = 'panda dataset {}'.format(DATASET_NAME)
+    source_text = RepairedText(infile)
+    try:
+        stats = run_pipeline(
+            csv.DictReader(source_text), sink, transform=transform,
+            name='Tickets', progress_every=1000)
+        if connection:
+            connection.commit()
+    finally:
+        if connection:
+            connection.close()
+    RUNVARS.created = stats.rows
+    if source_text.repaired:
+        print("Repaired the encoding of {} lines".format(
+            source_text.repaired))
+    for column, count in sorted(RUNVARS.bad_dates.items()):
+        print("Couldn't parse {} {} values; sent them as is".format(
+            count, column))
+    print("pushed {} rows to {}; process took {}".format(
         RUNVARS.created,
-        DATASET_NAME,
+        destination,
         (datetime.datetime.now() - RUNVARS.starter)))
 
 
+def voter_rows(path):
+    """
+    Yield the VOTER_MATCH_COLUMNS of each voter in a prepped load file.
+
+    path can also be a directory of load files, such as a statewide
+    LOADBASE, whose files are read in turn.
+    """
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            if not name.startswith('.'):
+                for row in voter_rows(os.path.join(path, name)):
+                    yield row
+        return
+    if path.endswith('.parquet'):
+        for row in parquet_rows(path, columns=VOTER_MATCH_COLUMNS):
+            yield row
+        return
+    indexes = [VOTER_LOAD_COLUMNS.index(col) for col in VOTER_MATCH_COLUMNS]
+    with open(path, 'r', newline='') as load_file:
+        reader = csv.reader(load_file)
+        next(reader, None)  # the header names raw columns
+        for row in reader:
+            yield [row[index] for index in indexes]
+
+
+def index_citees(infile):
+    """
+    Index a citations CSV's citees for matching to voters.
+
+    Each citee with a last name, first name and a DOB that parses is
+    filed under three keys, one for each kind of match in MATCH_SCORES,
+    all holding normalized names and the MM/DD/YYYY DOB. Returns the
+    index and the set of DOBs in it.
+    """
+    index = collections.defaultdict(list)
+    dobs = set()
+    source_text = RepairedText(infile)
+    for row in csv.DictReader(source_text):
+        RUNVARS.processed += 1
+        last = normalize_name(row['Last Name'])
+        first = normalize_name(row['First Name'])
+        dob = parse_dob(row['Date Of Birth'])
+        if not (last and first and dob):
+            RUNVARS.passed += 1
+            continue
+        dob = format_date(dob)
+        citee = Citee(
+            str(row['ID']), row['Last Name'], row['First Name'],
+            normalize_name(row['Middle Name'])[:1], dob,
+            normalize_name(row['Address Line 1']))
+        index[('name', last, first, dob)].append(citee)
+        index[('swapped', first, last, dob)].append(citee)
+        index[('initial', last, first[:1], dob)].append(citee)
+        dobs.add(dob)
+    return index, dobs
+
+
+def match_score(kind, citee, mname, addr1):
+    """
+    Score a citee-voter match from 0 to 1.
+
+    That's the MATCH_SCORES for its kind, raised or lowered by whether
+    the middle initials and street addresses agree.
+    """
+    score = MATCH_SCORES[kind]
+    middle = normalize_name(mname)[:1]
+    if citee.middle and middle:
+        if citee.middle == middle:
+            score += MIDDLE_INITIAL_AGREES
+        else:
+            score += MIDDLE_INITIAL_CONFLICTS
+    if citee.address and citee.address == normalize_name(addr1):
+        score += ADDRESS_AGREES
+    return round(min(score, 1.0), 2)
+
+
+def match_tickets(infile, voter_path, out_path=MATCHES_CSV):
+    """
+    Match the citees in a citations CSV to voters in prepped load files.
+
+    The citees, far fewer than the voters, are indexed in memory with
+    index_citees(), and the voters are streamed past them once, so a
+    statewide directory of load files takes no more memory than one
+    county's file. Voters born on days no citee was are skipped before
+    their names are even normalized. Each citee-voter pair is written
+    to out_path once, with its best score, best matches first.
+    """
+    if not os.path.isfile(infile):
+        print("Couldn't find the source file '{}'".format(infile))
+        return
+    index, dobs = index_citees(infile)
+    matches = {}
+    voters = 0
+    for voter_id, lname, fname, mname, birthdate, addr1 in voter_rows(
+            voter_path):
+        voters += 1
+        if birthdate not in dobs:
+            continue
+        last = normalize_name(lname)
+        first = normalize_name(fname)
+        for kind, key in [
+                ('name', (last, first)),
+                ('swapped', (last, first)),
+                ('initial', (last, first[:1]))]:
+            for citee in index.get((kind,) + key + (birthdate,), ()):
+                score = match_score(kind, citee, mname, addr1)
+                pair = (citee.external_id, voter_id)
+                if pair not in matches or score > matches[pair][0]:
+                    matches[pair] = (
+                        score, kind, citee, [lname, fname, birthdate])
+    rows = sorted(
+        ([external_id, voter_id, score, kind, citee.lname, citee.fname,
+          citee.dob] + voter)
+        for (external_id, voter_id), (score, kind, citee, voter)
+        in matches.items())
+    rows.sort(key=lambda row: row[2], reverse=True)
+    stats = run_pipeline(rows, CSVSink(out_path, header=MATCH_HEADINGS))
+    matched = len({row[0] for row in rows})
+    print("Matched {} of {} citations to {} of {} voters; "
+          "wrote {} pairs to {}; process took {}".format(
+              matched, RUNVARS.processed, len({row[1] for row in rows}),
+              voters, stats.rows, out_path,
+              datetime.datetime.now() - RUNVARS.starter))
+    if RUNVARS.passed:
+        print("Skipped {} citations without a name and DOB".format(
+            RUNVARS.passed))
+
+
 if __name__ == "__main__":
     """
     Load a spreadsheet of Tampa bicycle citations into PANDA.
 
     If no source file path is passed,
     the default will be /data/AllBikeViolations.csv
+    Add --csv=PATH or --postgres=DB to load a local CSV file or Postgres
+    table instead. Or add --match=LOAD_FILE, a prepped voter load file or
+    a directory of them, to match the citees to voters instead, writing
+    the pairs to --out=PATH (citation_voter_matches.csv by default).
     """
-    if not initialize_dataset():
+    csv_path = get_option('csv')
+    postgres_db = get_option('postgres')
+    match_path = get_option('match')
+    if not (csv_path or postgres_db or match_path) and (
+            not initialize_dataset()):
         print("Couldn't initialize the PANDA dataset.")
         sys.exit(1)
-    if len(sys.argv) > 1:
-        source = sys.argv[1]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if args:
+        source = args[0]
     else:
         source = "/data/AllBikeViolations.csv"
-    load_tickets(source)
+    if match_path:
+        match_tickets(source, match_path, get_option('out', MATCHES_CSV))
+    else:
+        load_tickets(source, csv_path=csv_path, postgres_db=postgres_db)
@@ -0,0 +1,74 @@
+"""
+A shared streaming pipeline for the panda-loaders scripts.
+
+run_pipeline() reads items from a source, turns each into a record with
+a transform, gathers records into batches and hands each batch to a sink:
+PandaSink for a PANDA dataset, PostgresCopySink for a Postgres table,
+CSVSink for a local file or ParquetSink for a compressed columnar one.
+ArrowCopySink COPYs whole Arrow record batches, such as those
+parquet_batches() reads, into Postgres; ArrowCSVSink and ArrowParquetSink
+write them to files. Every run returns the same
+PipelineStats. RepairedText reads raw text files for a source, fixing
+their encoding problems on the way in.
+"""
+
+from .columnar import (
+    ArrowCopySink,
+    ArrowCSVSink,
+    ArrowParquetSink,
+    ParquetSink,
+    batch_rows,
+    import_pyarrow,
+    parquet_batches,
+    parquet_rows,
+    rebatch,
+)
+from .core import PipelineStats, Sink, run_pipeline
+from .files import CSVSink
+from .panda import (
+    BatchEncoder,
+    BatchSizer,
+    PandaBatchWindow,
+    PandaSink,
+    call_with_retries,
+    delete_with_retries,
+    get_panda_session,
+    panda_delete,
+    panda_get,
+    panda_put,
+    put_with_retries,
+)
+from .postgres import PostgresCopySink, run_sql_file
+from .text import RepairedText, repair_line, sniff_encoding
+
+__all__ = [
+    "ArrowCopySink",
+    "ArrowCSVSink",
+    "ArrowParquetSink",
+    "BatchEncoder",
+    "BatchSizer",
+    "CSVSink",
+    "PandaBatchWindow",
+    "PandaSink",
+    "ParquetSink",
+    "PipelineStats",
+    "PostgresCopySink",
+    "RepairedText",
+    "Sink",
+    "batch_rows",
+    "call_with_retries",
+    "delete_with_retries",
+    "get_panda_session",
+    "import_pyarrow",
+    "panda_delete",
+    "panda_get",
+    "panda_put",
+    "parquet_batches",
+    "parquet_rows",
+    "put_with_retries",
+    "rebatch",
+    "repair_line",
+    "run_pipeline",
+    "run_sql_file",
+    "sniff_encoding",
+]
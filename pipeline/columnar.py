@@ -0,0 +1,287 @@
+import csv
+import io
+import os
+
+from .core import Sink
+
+PARQUET_COMPRESSION = os.getenv("PARQUET_COMPRESSION", "zstd")
+PARQUET_BATCH_ROWS = 65536  # rows per record batch, and so per row group
+
+
+def import_pyarrow():
+    """
+    Import pyarrow and its parquet module, which are optional.
+
+    pyarrow.compute and pyarrow.csv are imported as well, so callers
+    can reach them through the returned pyarrow module.
+    """
+    try:
+        import pyarrow
+        import pyarrow.compute  # noqa: F401
+        import pyarrow.csv  # noqa: F401
+        import pyarrow.parquet
+    except ImportError:
+        print(
+            "Parquet files require pyarrow "
+            "(pip install -r requirements/columnar.txt)"
+        )
+        raise
+    return pyarrow, pyarrow.parquet
+
+
+class ParquetSink(Sink):
+    """
+    Write records, each a list of string values, to a Parquet file.
+
+    Values are gathered by column, and each batch becomes one record
+    batch of string columns; dictionary_columns are dictionary-encoded,
+    which suits low-cardinality values such as codes and city names.
+    The file is compressed with PARQUET_COMPRESSION (zstd by default)
+    and removed again if the pipeline fails.
+    """
+
+    batch_size = PARQUET_BATCH_ROWS
+
+    def __init__(self, path, columns, dictionary_columns=(), batch_size=None):
+        self.pa, self.pq = import_pyarrow()
+        self.path = path
+        self.columns = list(columns)
+        self.dictionary_columns = set(dictionary_columns)
+        if batch_size:
+            self.batch_size = batch_size
+        self.schema = self.pa.schema(
+            [
+                (
+                    column,
+                    (
+                        self.pa.dictionary(self.pa.int32(), self.pa.string())
+                        if column in self.dictionary_columns
+                        else self.pa.string()
+                    ),
+                )
+                for column in self.columns
+            ]
+        )
+        self.writer = self.pq.ParquetWriter(
+            path, self.schema, compression=PARQUET_COMPRESSION
+        )
+        self.values = [[] for _ in self.columns]
+
+    def add(self, record):
+        for values, value in zip(self.values, record):
+            values.append(value)
+
+    def flush(self):
+        arrays = []
+        for column, values in zip(self.columns, self.values):
+            array = self.pa.array(values, self.pa.string())
+            if column in self.dictionary_columns:
+                array = array.dictionary_encode()
+            arrays.append(array)
+        self.writer.write_batch(
+            self.pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+        )
+        self.values = [[] for _ in self.columns]
+
+    def close(self, ok=True):
+        self.writer.close()
+        if not ok and os.path.isfile(self.path):
+            os.remove(self.path)
+
+
+def column_values(column):
+    """
+    Return a record batch column as a list of Python values.
+
+    Dictionary-encoded columns are decoded by looking their indices up in
+    a list of their distinct values, which is many times faster than
+    converting each value on its own.
+    """
+    if hasattr(column, "indices"):
+        values = column.dictionary.to_pylist()
+        return list(map(values.__getitem__, column.indices.to_pylist()))
+    return column.to_pylist()
+
+
+def parquet_rows(path, columns=None, batch_size=PARQUET_BATCH_ROWS):
+    """
+    Yield the rows of a Parquet file as lists of values.
+
+    Only the named columns are read, in the order given, if columns
+    is passed; otherwise every column is, in file order. The file is
+    read a record batch at a time.
+    """
+    pq = import_pyarrow()[1]
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(
+        batch_size=batch_size, columns=columns
+    ):
+        yield from batch_rows(batch)
+
+
+def batch_rows(batch):
+    """Return an iterator over the rows of a record batch, as lists."""
+    return map(list, zip(*map(column_values, batch.columns)))
+
+
+def parquet_batches(path, columns=None, batch_size=PARQUET_BATCH_ROWS):
+    """
+    Yield the record batches of a Parquet file, as Arrow data.
+
+    Only the named columns are read, in the order given, if columns
+    is passed; otherwise every column is, in file order.
+    """
+    pq = import_pyarrow()[1]
+    parquet_file = pq.ParquetFile(path)
+    yield from parquet_file.iter_batches(
+        batch_size=batch_size, columns=columns
+    )
+
+
+def rebatch(batches, size):
+    """
+    Yield the rows of record batches again, in batches of size rows.
+
+    Only the last batch is short. Rows are held only until size of
+    them are in hand.
+    """
+    pa = import_pyarrow()[0]
+    pending = []
+    rows = 0
+    for batch in batches:
+        pending.append(batch)
+        rows += batch.num_rows
+        if rows >= size:
+            table = pa.Table.from_batches(pending).combine_chunks()
+            whole = rows - rows % size
+            yield from table.slice(0, whole).to_batches(max_chunksize=size)
+            pending = table.slice(whole).to_batches()
+            rows -= whole
+    if rows:
+        yield from pa.Table.from_batches(pending).combine_chunks().to_batches()
+
+
+class ArrowCSVSink(Sink):
+    """
+    Write Arrow record batches of string columns to a local CSV file.
+
+    Each record is a whole record batch, rendered a column at a time with
+    pyarrow.compute, without Python rows. The file is the one CSVSink
+    writes for the same rows: values are quoted only when they hold a
+    comma, quote or line break, and lines end in "\\r\\n". Like CSVSink,
+    it removes the file again if the pipeline fails.
+    """
+
+    batch_size = 1
+
+    def __init__(self, path, header=None):
+        self.pa = import_pyarrow()[0]
+        self.path = path
+        self.file = open(path, "wb")
+        if header:
+            header_line = io.StringIO()
+            csv.writer(header_line).writerow(header)
+            self.file.write(header_line.getvalue().encode())
+
+    def add(self, batch):
+        if not batch.num_rows:
+            return
+        pc = self.pa.compute
+        columns = []
+        for column in batch.columns:
+            special = pc.match_substring_regex(column, '[,"\\r\\n]')
+            if pc.any(special).as_py():
+                quoted = pc.binary_join_element_wise(
+                    '"', pc.replace_substring(column, '"', '""'), '"', ""
+                )
+                column = pc.if_else(special, quoted, column)
+            columns.append(column)
+        lines = pc.binary_join_element_wise(*columns, ",")
+        lines = pc.binary_join_element_wise(lines, "", "\r\n")
+        offsets = self.pa.array([0, len(lines)], self.pa.int32())
+        text = pc.binary_join(
+            self.pa.ListArray.from_arrays(offsets, lines), ""
+        )
+        self.file.write(text[0].as_buffer())
+
+    def close(self, ok=True):
+        self.file.close()
+        if not ok and os.path.isfile(self.path):
+            os.remove(self.path)
+
+
+class ArrowParquetSink(ParquetSink):
+    """
+    Write Arrow record batches of string columns to a Parquet file.
+
+    Each record is a whole record batch, written as one row group with
+    the columns named when the sink was made, in that order.
+    """
+
+    batch_size = 1
+
+    def add(self, batch):
+        arrays = []
+        for column in self.columns:
+            array = batch.column(column)
+            if column in self.dictionary_columns:
+                array = array.dictionary_encode()
+            arrays.append(array)
+        self.writer.write_batch(
+            self.pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+        )
+
+    def flush(self):
+        pass
+
+
+class ArrowCopySink(Sink):
+    """
+    COPY Arrow record batches into a Postgres table, without Python rows.
+
+    Each record is a whole record batch, rendered to CSV by pyarrow and
+    sent with one COPY ... FROM STDIN. Empty strings are sent as NULLs,
+    as PostgresCopySink's CSV sends them. Nothing is committed here.
+    rows counts the rows sent.
+    """
+
+    batch_size = 1
+
+    def __init__(self, connection, table, columns):
+        self.pa = import_pyarrow()[0]
+        if not isinstance(columns, str):
+            columns = ", ".join(columns)
+        self.statement = f"COPY {table} ({columns}) FROM STDIN WITH CSV"
+        self.cursor = connection.cursor()
+        self.buffer = io.BytesIO()
+        self.options = self.pa.csv.WriteOptions(include_header=False)
+        self.rows = 0
+
+    def add(self, batch):
+        pa = self.pa
+        arrays = []
+        for array in batch.columns:
+            if pa.types.is_dictionary(array.type):
+                array = array.dictionary_decode()
+            if pa.types.is_string(array.type):
+                array = pa.compute.if_else(
+                    pa.compute.equal(array, ""),
+                    pa.scalar(None, pa.string()),
+                    array,
+                )
+            arrays.append(array)
+        pa.csv.write_csv(
+            pa.RecordBatch.from_arrays(arrays, names=batch.schema.names),
+            self.buffer,
+            self.options,
+        )
+        self.rows += batch.num_rows
+
+    def flush(self):
+        self.buffer.seek(0)
+        self.cursor.copy_expert(self.statement, self.buffer, size=1 << 16)
+        self.buffer.seek(0)
+        self.buffer.truncate()
+
+    def close(self, ok=True):
+        self.cursor.close()
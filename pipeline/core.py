@@ -0,0 +1,92 @@
+import datetime
+
+
+class Sink:
+    """
+    Where a pipeline's records end up.
+
+    Sinks buffer records in add() and ship them in flush(), which the
+    pipeline calls whenever batch_size records are waiting and once more
+    at the end. close() runs when the pipeline stops; ok is False if it
+    stopped on an error.
+    """
+
+    batch_size = 1000
+
+    def add(self, record):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+    def close(self, ok=True):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(ok=exc_type is None)
+
+
+class PipelineStats:
+    """Count what a pipeline read, dropped and shipped, and time it."""
+
+    def __init__(self, name):
+        self.name = name
+        self.read = 0
+        self.dropped = 0
+        self.rows = 0
+        self.batches = 0
+        self.start = datetime.datetime.now()
+        self.end = None
+
+    @property
+    def elapsed(self):
+        return (self.end or datetime.datetime.now()) - self.start
+
+    def shipped(self, rows, progress_every=None):
+        self.batches += 1
+        self.rows += rows
+        if progress_every and (
+            self.rows // progress_every > (self.rows - rows) // progress_every
+        ):
+            print(f"{self.name}: loaded so far: {self.rows}")
+
+    def __str__(self):
+        dropped = f", skipped {self.dropped}" if self.dropped else ""
+        return (
+            f"{self.name}: {self.rows} rows in {self.batches} batches"
+            f"{dropped}; process took {self.elapsed}"
+        )
+
+
+def run_pipeline(source, sink, transform=None, name=None, progress_every=None):
+    """
+    Stream items from source through transform into sink, in batches.
+
+    transform turns each item into a record for the sink, or None to skip
+    it. The sink is closed when the source runs out or anything fails.
+    Returns the run's PipelineStats; with progress_every, a running
+    count is printed each time that many more rows have shipped.
+    """
+    stats = PipelineStats(name or type(sink).__name__)
+    pending = 0
+    with sink:
+        for item in source:
+            stats.read += 1
+            record = transform(item) if transform else item
+            if record is None:
+                stats.dropped += 1
+                continue
+            sink.add(record)
+            pending += 1
+            if pending >= sink.batch_size:
+                sink.flush()
+                stats.shipped(pending, progress_every)
+                pending = 0
+        if pending:
+            sink.flush()
+            stats.shipped(pending, progress_every)
+    stats.end = datetime.datetime.now()
+    return stats
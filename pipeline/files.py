@@ -0,0 +1,30 @@
+import csv
+import os
+
+from .core import Sink
+
+
+class CSVSink(Sink):
+    """
+    Write records, each a list of values, to a local CSV file.
+
+    The file is removed again if the pipeline fails, so a partial file
+    is never taken for a whole one.
+    """
+
+    batch_size = 10000
+
+    def __init__(self, path, header=None):
+        self.path = path
+        self.file = open(path, "w", newline="")
+        self.writer = csv.writer(self.file)
+        if header:
+            self.writer.writerow(header)
+
+    def add(self, record):
+        self.writer.writerow(record)
+
+    def close(self, ok=True):
+        self.file.close()
+        if not ok and os.path.isfile(self.path):
+            os.remove(self.path)
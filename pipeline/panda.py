@@ -0,0 +1,282 @@
+import collections
+import io
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from .core import Sink
+
+PANDA_AUTH_PARAMS = {
+    "email": os.getenv("PANDA_USER"),
+    "api_key": os.getenv("PANDA_API_KEY"),
+}
+PANDA_BULK_UPDATE_SIZE = 1000  # starting batch size; see BatchSizer
+PANDA_BATCH_FLOOR = int(os.getenv("PANDA_BATCH_FLOOR", "100"))
+PANDA_BATCH_CEILING = int(os.getenv("PANDA_BATCH_CEILING", "5000"))
+PANDA_BATCH_SECONDS = float(os.getenv("PANDA_BATCH_SECONDS", "5"))  # per PUT
+PANDA_RETRIES = int(os.getenv("PANDA_RETRIES", "5"))
+PANDA_BACKOFF = float(os.getenv("PANDA_BACKOFF", "1"))  # seconds
+PANDA_TIMEOUT = float(os.getenv("PANDA_TIMEOUT", "120"))  # seconds
+PANDA_RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+PANDA_GZIP = int(os.getenv("PANDA_GZIP", "0"))  # gzip level for PUTs; 0 = off
+PANDA_IN_FLIGHT = int(os.getenv("PANDA_IN_FLIGHT", "4"))  # batches at once
+PANDA_SESSIONS = threading.local()
+
+
+def get_panda_session():
+    """Return this thread's keep-alive session for PANDA calls."""
+    session = getattr(PANDA_SESSIONS, "session", None)
+    if session is None:
+        session = requests.Session()
+        PANDA_SESSIONS.session = session
+    return session
+
+
+def panda_get(url, params=None):
+    """GET call to Panda API."""
+    if not params:
+        params = PANDA_AUTH_PARAMS
+    else:
+        params.update(PANDA_AUTH_PARAMS)
+    return get_panda_session().get(url, params=params, timeout=PANDA_TIMEOUT)
+
+
+def panda_put(url, data, params=None, headers=None):
+    """PUT call to Panda API."""
+    if not params:
+        params = PANDA_AUTH_PARAMS
+    else:
+        params.update(PANDA_AUTH_PARAMS)
+    put_headers = {"Content-Type": "application/json"}
+    put_headers.update(headers or {})
+    return get_panda_session().put(
+        url,
+        data,
+        params=params,
+        headers=put_headers,
+        timeout=PANDA_TIMEOUT,
+    )
+
+
+def panda_delete(url, params=None):
+    """DELETE call to Panda API."""
+    if not params:
+        params = PANDA_AUTH_PARAMS
+    else:
+        params.update(PANDA_AUTH_PARAMS)
+    return get_panda_session().delete(
+        url, params=params, timeout=PANDA_TIMEOUT
+    )
+
+
+def put_with_retries(url, data, params=None, headers=None):
+    """PUT to the Panda API via call_with_retries."""
+    return call_with_retries(panda_put, url, data, dict(params or {}), headers)
+
+
+def delete_with_retries(url):
+    """DELETE from the Panda API, counting a row that's already gone."""
+    return call_with_retries(panda_delete, url, {}, missing_ok=True)
+
+
+def call_with_retries(call, *args, missing_ok=False):
+    """
+    Call the Panda API, checking the response and retrying failures.
+
+    Timeouts, dropped connections and 408, 429 and 5xx responses are
+    retried up to PANDA_RETRIES times, sleeping a random interval of up to
+    PANDA_BACKOFF * 2^attempt seconds between tries; other error responses
+    raise right away, except a 404 with missing_ok. Returns the seconds
+    the successful call took and how many attempts failed before it.
+    """
+    for attempt in range(PANDA_RETRIES + 1):
+        start = time.perf_counter()
+        try:
+            response = call(*args)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == PANDA_RETRIES:
+                raise
+        else:
+            if response.ok or (missing_ok and response.status_code == 404):
+                return time.perf_counter() - start, attempt
+            if (
+                response.status_code not in PANDA_RETRY_STATUSES
+                or attempt == PANDA_RETRIES
+            ):
+                response.raise_for_status()
+        time.sleep(random.uniform(0, PANDA_BACKOFF * 2**attempt))
+
+
+class BatchSizer:
+    """
+    Steer PANDA batch sizes toward PANDA_BATCH_SECONDS per PUT.
+
+    Batches grow by a quarter while they land in under half the target
+    time, shrink toward the target when they're slower than it, and halve
+    whenever one needed a retry, always staying between floor and ceiling.
+    """
+
+    def __init__(
+        self,
+        size=PANDA_BULK_UPDATE_SIZE,
+        floor=PANDA_BATCH_FLOOR,
+        ceiling=PANDA_BATCH_CEILING,
+        target=PANDA_BATCH_SECONDS,
+    ):
+        self.floor = floor
+        self.ceiling = ceiling
+        self.target = target
+        self.size = min(ceiling, max(floor, size))
+
+    def record(self, rows, seconds, retries):
+        if retries:
+            size = self.size // 2
+        elif seconds > self.target:
+            size = int(rows * self.target / seconds)
+        elif seconds < self.target / 2:
+            size = self.size + max(1, self.size // 4)
+        else:
+            size = self.size
+        self.size = min(self.ceiling, max(self.floor, size))
+
+
+class BatchEncoder:
+    """
+    Encode the JSON body of a PANDA batch a row at a time.
+
+    Rows are written as they're added, into a buffer that's reused from
+    batch to batch, so no batch dict or full-size JSON string gets built;
+    the body matches json.dumps({"objects": [...]}). With a gzip level
+    (PANDA_GZIP), rows are compressed as they're added, and headers
+    carries the Content-Encoding to send with the body.
+    """
+
+    def __init__(self, gzip_level=PANDA_GZIP):
+        self.gzip_level = gzip_level
+        self.headers = {"Content-Encoding": "gzip"} if gzip_level else {}
+        self.buffer = io.BytesIO()
+        self.reset()
+
+    def reset(self):
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        self.rows = 0
+        if self.gzip_level:
+            self.compressor = zlib.compressobj(self.gzip_level, wbits=31)
+        self.write(b'{"objects": [')
+
+    def write(self, data):
+        if self.gzip_level:
+            data = self.compressor.compress(data)
+        self.buffer.write(data)
+
+    def add(self, external_id, data):
+        self.write(
+            '{}{{"external_id": {}, "data": {}}}'.format(
+                ", " if self.rows else "",
+                json.dumps(external_id),
+                json.dumps(data),
+            ).encode("utf-8")
+        )
+        self.rows += 1
+
+    def take(self):
+        """Return the finished body and start the next batch."""
+        self.write(b"]}")
+        if self.gzip_level:
+            self.buffer.write(self.compressor.flush())
+        body = self.buffer.getvalue()
+        self.reset()
+        return body
+
+
+class PandaBatchWindow:
+    """
+    Ship PUT batches to a PANDA URL from a pool of threads.
+
+    At most in_flight batches are outstanding at once; put() waits on the
+    oldest one before sending another. Each batch is retried as needed
+    by put_with_retries, and its timing feeds sizer, whose size callers
+    should use for their next batch. Any headers, such as a
+    BatchEncoder's, go out with every batch. Batches are acknowledged in
+    the order they were sent, calling on_ack with each one's row count, so
+    everything before an acknowledged batch has landed too. Errors
+    surface from put() or close(), and nothing is acknowledged after one.
+    """
+
+    def __init__(self, url, in_flight, on_ack=None, headers=None):
+        self.url = url
+        self.headers = headers
+        self.in_flight = in_flight
+        self.on_ack = on_ack
+        self.sizer = BatchSizer()
+        self.executor = ThreadPoolExecutor(max_workers=in_flight)
+        self.pending = collections.deque()
+
+    def wait_oldest(self):
+        future, rows = self.pending.popleft()
+        seconds, retries = future.result()
+        self.sizer.record(rows, seconds, retries)
+        if self.on_ack:
+            self.on_ack(rows)
+
+    def put(self, payload, rows):
+        while len(self.pending) >= self.in_flight:
+            self.wait_oldest()
+        future = self.executor.submit(
+            put_with_retries, self.url, payload, None, self.headers
+        )
+        self.pending.append((future, rows))
+
+    def close(self, acknowledge=True):
+        """Wait on outstanding batches, or drop them unacknowledged."""
+        try:
+            while acknowledge and self.pending:
+                self.wait_oldest()
+        finally:
+            self.pending.clear()
+            self.executor.shutdown(cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # after a failed batch, later ones mustn't move the checkpoint
+        self.close(acknowledge=exc_type is None)
+
+
+class PandaSink(Sink):
+    """
+    PUT (external_id, data) records to a PANDA dataset's data URL.
+
+    Records are encoded into a BatchEncoder as they arrive, and batches
+    go out through a PandaBatchWindow, whose sizer sets batch_size.
+    on_ack is called with each acknowledged batch's row count; once
+    the pipeline fails, nothing more is acknowledged.
+    """
+
+    def __init__(self, url, in_flight=PANDA_IN_FLIGHT, on_ack=None):
+        self.encoder = BatchEncoder()
+        self.window = PandaBatchWindow(
+            url, in_flight, on_ack, self.encoder.headers
+        )
+
+    @property
+    def batch_size(self):
+        return self.window.sizer.size
+
+    def add(self, record):
+        self.encoder.add(*record)
+
+    def flush(self):
+        rows = self.encoder.rows
+        self.window.put(self.encoder.take(), rows)
+
+    def close(self, ok=True):
+        self.window.close(acknowledge=ok)
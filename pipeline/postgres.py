@@ -0,0 +1,57 @@
+import csv
+import io
+
+from .core import Sink
+
+
+class PostgresCopySink(Sink):
+    """
+    COPY records, each a list of column values, into a Postgres table.
+
+    Each batch is rendered as CSV into a reused buffer and sent with one
+    COPY ... FROM STDIN. Nothing is committed here, so callers decide
+    what a transaction covers. columns is a list of column names or a
+    comma-separated string of them.
+    """
+
+    batch_size = 50000
+
+    def __init__(self, connection, table, columns, batch_size=None):
+        if not isinstance(columns, str):
+            columns = ", ".join(columns)
+        self.statement = f"COPY {table} ({columns}) FROM STDIN WITH CSV"
+        if batch_size:
+            self.batch_size = batch_size
+        self.cursor = connection.cursor()
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+
+    def add(self, record):
+        self.writer.writerow(record)
+
+    def flush(self):
+        self.buffer.seek(0)
+        self.cursor.copy_expert(self.statement, self.buffer, size=1 << 16)
+        self.buffer.seek(0)
+        self.buffer.truncate()
+
+    def close(self, ok=True):
+        self.cursor.close()
+
+
+def run_sql_file(connection, path):
+    """
+    Run a file of SQL statements on a connection, as psql -f would.
+
+    The statements run in autocommit mode, so a file's own BEGIN and
+    COMMIT lines decide its transactions.
+    """
+    with open(path, "r") as sql_file:
+        statements = sql_file.read()
+    autocommit = connection.autocommit
+    connection.autocommit = True
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(statements)
+    finally:
+        connection.autocommit = autocommit
@@ -0,0 +1,126 @@
+import codecs
+import io
+import re
+
+SNIFF_BYTES = 1 << 16
+READ_BLOCK_BYTES = 1 << 20
+BOMS = [
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+# What UTF-8 continuation bytes turn into when read as cp1252 or latin-1
+CONTINUATIONS = bytes(range(0x80, 0xC0)).decode("cp1252", "ignore")
+CONTINUATIONS += bytes(range(0x80, 0xA0)).decode("latin-1")
+CONTINUATION = f"[{re.escape(CONTINUATIONS)}]"
+# Undecodable bytes (escaped as lone surrogates), stray byte order marks,
+# and UTF-8 read as cp1252 or latin-1, such as "Ã©" for "é" or "â€™" for
+# "’". Only the lead characters that double-encoded Latin letters and
+# punctuation start with count, since pairs like "É’" are common in
+# clean text and happen to decode as UTF-8 too.
+SURROGATES = re.compile("[\udc80-\udcff]")
+MOJIBAKE = re.compile(f"[ÂÃÅ]{CONTINUATION}|â{CONTINUATION}{{2}}")
+NEEDS_REPAIR = re.compile(f"{SURROGATES.pattern}|\ufeff|{MOJIBAKE.pattern}")
+# What makes a line look badly decoded, for badness()
+SUSPICIOUS = re.compile(f"{MOJIBAKE.pattern}|[\x80-\x9f\ufffd]")
+
+
+def sniff_encoding(path, sample_size=SNIFF_BYTES):
+    """
+    Guess a text file's encoding from its first sample_size bytes.
+
+    A byte order mark decides it; the BOM codecs strip the mark as they
+    decode. Otherwise the file is UTF-8 if the sample decodes as UTF-8,
+    and cp1252, which Windows exports use, if it doesn't.
+    """
+    with open(path, "rb") as f:
+        sample = f.read(sample_size)
+    for bom, encoding in BOMS:
+        if sample.startswith(bom):
+            return encoding
+    try:
+        # a character cut off at the end of the sample doesn't count
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+    except UnicodeDecodeError:
+        return "cp1252"
+    return "utf-8"
+
+
+def unmangle(match):
+    """Decode a run of mojibake back to the UTF-8 text it came from."""
+    text = match.group()
+    for encoding in ("cp1252", "latin-1"):
+        try:
+            return text.encode(encoding).decode("utf-8")
+        except UnicodeError:
+            pass
+    return text
+
+
+def badness(text):
+    """Count the mojibake runs and control characters in text."""
+    return len(SUSPICIOUS.findall(text))
+
+
+def repair_line(line):
+    """
+    Fix the encoding problems in a line of text.
+
+    Undecodable bytes are read as cp1252 and stray byte order marks are
+    dropped. Mojibake is decoded back to the UTF-8 text it came from,
+    but only if that leaves the line looking less badly decoded;
+    otherwise the line keeps its text as it was.
+    """
+    line = SURROGATES.sub(
+        lambda match: bytes([ord(match.group()) - 0xDC00]).decode(
+            "cp1252", "replace"
+        ),
+        line,
+    ).replace("\ufeff", "")
+    unmangled = MOJIBAKE.sub(unmangle, line)
+    if unmangled != line and badness(unmangled) < badness(line):
+        return unmangled
+    return line
+
+
+class RepairedText:
+    """
+    Iterate over the lines of a text file, repairing bad ones.
+
+    The file is decoded in block_size blocks, in its sniffed encoding
+    unless one is passed, and split into lines as open(newline="")
+    would split them. Lines that are plain ASCII, or whose non-ASCII
+    text passes a quick regex check, are passed along as they are; only
+    the rest go through repair_line(). repaired counts the lines it
+    actually changed.
+    """
+
+    def __init__(self, path, encoding=None, block_size=READ_BLOCK_BYTES):
+        self.path = path
+        self.encoding = encoding or sniff_encoding(path)
+        self.block_size = block_size
+        self.repaired = 0
+
+    def __iter__(self):
+        decoder = codecs.getincrementaldecoder(self.encoding)(
+            errors="surrogateescape"
+        )
+        partial = ""
+        with open(self.path, "rb") as f:
+            while True:
+                block = f.read(self.block_size)
+                text = partial + decoder.decode(block, final=not block)
+                lines = list(io.StringIO(text, newline=""))
+                partial = ""
+                # hold back a line that may continue in the next block
+                if block and lines and not lines[-1].endswith("\n"):
+                    partial = lines.pop()
+                for line in lines:
+                    if not line.isascii() and NEEDS_REPAIR.search(line):
+                        repaired = repair_line(line)
+                        if repaired != line:
+                            line = repaired
+                            self.repaired += 1
+                    yield line
+                if not block:
+                    return
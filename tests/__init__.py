@@ -0,0 +1,12 @@
+import os
+import sys
+
+# load_county_voters needs VOTER_DATA_DATE when it's imported, and is
+# imported the way its neighbours in voters/ import it
+os.environ.setdefault("VOTER_DATA_DATE", "2024-01-01")
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "voters"
+    ),
+)
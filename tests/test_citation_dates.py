@@ -0,0 +1,114 @@
+import collections
+import datetime
+import unittest
+from unittest import mock
+
+from dateutil import parser
+
+from citations import load_tampa_bike_citations as citations
+
+# Values the DATE_FORMATS handle without dateutil
+FAST_DATES = [
+    "05/06/2005",
+    "5/6/2005",
+    "12/31/1999 00:00:00",
+    "1/2/1970 13:45",
+    "2005-05-06",
+    "2005-5-6",
+    "1999-12-31T08:30:00",
+]
+
+
+class ParseDateTests(unittest.TestCase):
+    def setUp(self):
+        citations.parse_date.cache_clear()
+        self.addCleanup(citations.parse_date.cache_clear)
+
+    def test_fast_path_agrees_with_dateutil(self):
+        for value in FAST_DATES:
+            with self.subTest(value=value):
+                self.assertEqual(
+                    citations.parse_date(value), parser.parse(value).date()
+                )
+
+    def test_fast_path_skips_dateutil(self):
+        with mock.patch.object(citations.parser, "parse") as parse:
+            for value in FAST_DATES + [" 05/06/2005 ", "02/30/1970"]:
+                citations.parse_date(value)
+        parse.assert_not_called()
+
+    def test_other_formats_fall_back_to_dateutil(self):
+        for value in ("May 6, 2005", "20050506", "6 May 2005"):
+            with self.subTest(value=value):
+                self.assertEqual(
+                    citations.parse_date(value), datetime.date(2005, 5, 6)
+                )
+
+    def test_unparseable(self):
+        for value in ("", "   ", "not a date", "02/30/1970", "13/01/2005"):
+            with self.subTest(value=value):
+                self.assertIsNone(citations.parse_date(value))
+
+    def test_repeated_values_are_cached(self):
+        with mock.patch.object(
+            citations.parser, "parse", wraps=parser.parse
+        ) as parse:
+            for _ in range(3):
+                citations.parse_date("May 6, 2005")
+        self.assertEqual(parse.call_count, 1)
+        self.assertEqual(citations.parse_date.cache_info().hits, 2)
+
+
+class NormalizeDateTests(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(
+            citations.RUNVARS, "bad_dates", collections.Counter()
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_dates_are_formatted_like_voter_dates(self):
+        row = {"date": "5/6/2005 00:00:00", "DOB": "1970-01-02"}
+        self.assertEqual(citations.normalize_date(row, "date"), "05/06/2005")
+        self.assertEqual(
+            citations.normalize_date(row, "DOB", citations.parse_dob),
+            "01/02/1970",
+        )
+        self.assertEqual(citations.RUNVARS.bad_dates, {})
+
+    def test_bad_dates_are_kept_and_counted(self):
+        for value in ("not a date", "02/30/1970", ""):
+            row = {"date": value}
+            self.assertEqual(citations.normalize_date(row, "date"), value)
+        self.assertEqual(citations.RUNVARS.bad_dates, {"date": 2})
+
+
+class ParseDobTests(unittest.TestCase):
+    def test_four_digit_years_kept(self):
+        for value in ("05/06/2005", "2005-05-06", "5/6/2005 00:00:00"):
+            with self.subTest(value=value):
+                self.assertEqual(
+                    citations.parse_dob(value), datetime.date(2005, 5, 6)
+                )
+
+    def test_two_digit_years_pulled_back(self):
+        for value in ("5/6/05", " 05-06-05 "):
+            with self.subTest(value=value):
+                self.assertEqual(
+                    citations.parse_dob(value), datetime.date(1905, 5, 6)
+                )
+        self.assertEqual(
+            citations.parse_dob("1/2/70"), datetime.date(1970, 1, 2)
+        )
+
+    def test_unparseable(self):
+        for value in ("", "   ", "not a date", "02/30/1970"):
+            with self.subTest(value=value):
+                self.assertIsNone(citations.parse_dob(value))
+        self.assertIsNone(
+            citations.parse_dob(datetime.date.today().isoformat())
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
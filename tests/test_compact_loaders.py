@@ -0,0 +1,115 @@
+import unittest
+from unittest import mock
+
+import load_county_voters as lcv
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+# What seed_code_tables() returns: label -> id
+RACES = {label: int(code) for code, label in lcv._RACE.items()}
+PARTIES = {
+    label: index
+    for index, label in enumerate(sorted(set(lcv._PARTY.values())), 1)
+}
+# Dates as prep leaves them; registration dates aren't stripped
+DATES = [
+    "01/02/1970",
+    "1/2/1970",
+    " 01/02/2000",
+    "01/02/2000 ",
+    "2/29/2000",
+    "02/30/2000",
+    "13/01/1999",
+    "01/02",
+    "not a date",
+    "",
+]
+
+
+def load_file_row(**values):
+    """Return a prepped row in LOAD_COLUMNS order, given some values."""
+    return [values.get(column, "") for column in lcv.LOAD_COLUMNS]
+
+
+def copy_values(values):
+    """Make row and batch values comparable: ISO dates, "" for NULL."""
+    return [
+        value.isoformat() if hasattr(value, "isoformat") else value or ""
+        for value in values
+    ]
+
+
+@unittest.skipUnless(pyarrow, "Parquet loads need pyarrow")
+class CompactLoaderTests(unittest.TestCase):
+    def setUp(self):
+        for name, value in (
+            ("is_compact", lambda connection: True),
+            ("seed_code_tables", lambda connection: (RACES, PARTIES)),
+        ):
+            patcher = mock.patch.object(lcv, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.rows = [
+            load_file_row(
+                lname="Peña",
+                fname="José",
+                gender=gender,
+                race=race,
+                birthdate=birthdate,
+                party=party,
+                registration_date=registered,
+                voter_ID=str(index),
+            )
+            for index, (birthdate, registered, gender, race, party) in (
+                enumerate(
+                    zip(
+                        DATES,
+                        reversed(DATES),
+                        ["Female", "M", "", "U"] * 3,
+                        list(RACES) + ["Not A Race"] * 3,
+                        list(PARTIES)[:9] + ["Nope"],
+                    )
+                )
+            )
+        ]
+
+    def batch(self, dictionary=False):
+        arrays = [
+            pyarrow.array(column, pyarrow.string())
+            for column in zip(*self.rows)
+        ]
+        if dictionary:
+            arrays = [array.dictionary_encode() for array in arrays]
+        return pyarrow.RecordBatch.from_arrays(
+            arrays, names=lcv.LOAD_COLUMNS
+        )
+
+    def test_batches_load_as_rows_do(self):
+        row_loader = lcv.get_row_loader(None)
+        batch_loader = lcv.get_batch_loader(None)
+        expected = [
+            copy_values(row_loader(list(row), "HIL")) for row in self.rows
+        ]
+        for dictionary in (False, True):
+            with self.subTest(dictionary=dictionary):
+                loaded = batch_loader(self.batch(dictionary), "HIL")
+                columns = [column.to_pylist() for column in loaded.columns]
+                self.assertEqual(
+                    [copy_values(row) for row in zip(*columns)], expected
+                )
+
+    def test_lenient_dates(self):
+        batch_loader = lcv.get_batch_loader(None)
+        loaded = batch_loader(self.batch(), "HIL")
+        registered = lcv.LOAD_COLUMNS.index("registration_date")
+        self.assertEqual(
+            copy_values(loaded.column(registered).to_pylist())[-4:],
+            ["2000-01-02", "2000-01-02", "1970-01-02", "1970-01-02"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
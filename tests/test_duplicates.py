@@ -0,0 +1,124 @@
+import csv
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import load_county_voters as lcv
+
+# (county, voter_id, lname, fname, birthdate)
+VOTERS = [
+    ("HIL", "1", "Lee", "José", "01/02/1970"),
+    ("PIN", "2", "LEE", "Jose", "01/02/1970"),  # same voter, moved
+    ("PAS", "3", "Lee", "Jose", "01/03/1970"),  # different birthdate
+    ("HIL", "4", "O'Brien", "Al", "05/06/1980"),
+    ("HIL", "5", "OBrien", "Al", "05/06/1980"),  # same county only
+    ("PIN", "6", "Smith", "", "05/06/1980"),  # no first name
+    ("PAS", "7", "Smith", "", "05/06/1980"),
+    ("PAS", "8", "Diaz", "Ana", "07/08/1990"),
+    ("PIN", "9", "DÍAZ", "ANA", "07/08/1990"),
+    ("HIL", "10", "Diaz", "Ana", "07/08/1990"),
+]
+
+
+def load_row(voter_id, lname, fname, birthdate):
+    """Return a prepped row with just the columns blocking_key() reads."""
+    row = [""] * len(lcv.LOAD_COLUMNS)
+    row[0], row[1] = lname, fname
+    row[lcv.BIRTHDATE_INDEX] = birthdate
+    row[lcv.VOTER_ID_INDEX] = voter_id
+    return row
+
+
+class FindDuplicatesTests(unittest.TestCase):
+    def setUp(self):
+        base = tempfile.TemporaryDirectory()
+        self.addCleanup(base.cleanup)
+        paths = {
+            "LOADBASE": os.path.join(base.name, "load"),
+            "TEMP": os.path.join(base.name, "temp"),
+            "DUPLICATES_CSV": os.path.join(base.name, "duplicates.csv"),
+        }
+        for name, path in paths.items():
+            patcher = mock.patch.object(lcv, name, path)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        os.mkdir(lcv.LOADBASE)
+        os.mkdir(lcv.TEMP)
+        for slug in ("HIL", "PIN", "PAS"):
+            with open(lcv.load_path(slug, "csv"), "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(lcv.LOAD_COLUMNS)
+                for voter in VOTERS:
+                    if voter[0] == slug:
+                        writer.writerow(load_row(*voter[1:]))
+
+    def find_duplicates(self):
+        with mock.patch("builtins.print"):
+            count = lcv.find_duplicates()
+        self.assertEqual(os.listdir(lcv.TEMP), [])
+        with open(lcv.DUPLICATES_CSV, newline="") as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], lcv.DUPLICATE_HEADINGS)
+        self.assertEqual(len(rows) - 1, count)
+        return rows[1:]
+
+    def test_groups_that_span_counties(self):
+        groups = {}
+        for group, key, slug, voter_id, *_ in self.find_duplicates():
+            groups.setdefault(group, []).append((key, slug, voter_id))
+        self.assertEqual(
+            sorted(map(sorted, groups.values())),
+            [
+                [
+                    ("DIAZ ANA|07/08/1990", "HIL", "10"),
+                    ("DIAZ ANA|07/08/1990", "PAS", "8"),
+                    ("DIAZ ANA|07/08/1990", "PIN", "9"),
+                ],
+                [
+                    ("LEE JOSE|01/02/1970", "HIL", "1"),
+                    ("LEE JOSE|01/02/1970", "PIN", "2"),
+                ],
+            ],
+        )
+
+    def test_bucket_count_doesnt_change_the_groups(self):
+        expected = self.find_duplicates()
+        for buckets in (1, 2, 7):
+            with self.subTest(buckets=buckets):
+                with mock.patch.object(lcv, "DEDUP_BUCKETS", buckets):
+                    found = self.find_duplicates()
+                self.assertEqual(
+                    sorted(row[1:] for row in found),
+                    sorted(row[1:] for row in expected),
+                )
+
+    def test_output_doesnt_depend_on_the_hash_seed(self):
+        # str hashes change from run to run; bucketing mustn't follow them
+        script = (
+            "import load_county_voters as lcv\n"
+            f"lcv.LOADBASE = {lcv.LOADBASE!r}\n"
+            f"lcv.TEMP = {lcv.TEMP!r}\n"
+            f"lcv.DUPLICATES_CSV = {lcv.DUPLICATES_CSV!r}\n"
+            "lcv.find_duplicates()\n"
+            "print(open(lcv.DUPLICATES_CSV).read())\n"
+        )
+        outputs = set()
+        for seed in ("1", "2", "3"):
+            env = dict(os.environ, PYTHONHASHSEED=seed)
+            result = subprocess.run(
+                [sys.executable, "-c", script],
+                cwd=os.path.dirname(lcv.__file__),
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            outputs.add(result.stdout.split("\n", 1)[1])
+        self.assertEqual(len(outputs), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
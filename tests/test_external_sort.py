@@ -0,0 +1,58 @@
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+import load_county_voters as lcv
+
+
+def random_rows(count, seed=0):
+    """Return rows of strings, with repeats and values csv has to quote."""
+    chooser = random.Random(seed)
+    values = ["", "A", "a", "Lee", "Lee, Jr", 'Say "Hi"', "Émile", "Zed"]
+    return [
+        [chooser.choice(values), str(chooser.randrange(count // 2 + 1))]
+        for _ in range(count)
+    ]
+
+
+class ExternalSortTests(unittest.TestCase):
+    def setUp(self):
+        temp = tempfile.TemporaryDirectory()
+        self.addCleanup(temp.cleanup)
+        patcher = mock.patch.object(lcv, "TEMP", temp.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_sorted_like_sorted(self):
+        for count in (0, 1, 9, 10, 11, 100, 257):
+            with self.subTest(count=count):
+                rows = random_rows(count)
+                self.assertEqual(
+                    list(lcv.external_sort(rows, "TST", chunk_size=10)),
+                    sorted(rows),
+                )
+                self.assertEqual(os.listdir(lcv.TEMP), [])
+
+    def test_full_chunks_spill_to_runs(self):
+        rows = random_rows(35)
+        merged = lcv.external_sort(rows, "TST", chunk_size=10)
+        first = next(merged)
+        self.assertEqual(
+            sorted(os.listdir(lcv.TEMP)),
+            ["TST_run_0.csv", "TST_run_1.csv", "TST_run_2.csv"],
+        )
+        self.assertEqual([first] + list(merged), sorted(rows))
+        self.assertEqual(os.listdir(lcv.TEMP), [])
+
+    def test_one_chunk_stays_in_memory(self):
+        rows = random_rows(9)
+        merged = lcv.external_sort(rows, "TST", chunk_size=10)
+        first = next(merged)
+        self.assertEqual(os.listdir(lcv.TEMP), [])
+        self.assertEqual([first] + list(merged), sorted(rows))
+
+
+if __name__ == "__main__":
+    unittest.main()
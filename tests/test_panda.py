@@ -0,0 +1,134 @@
+import gzip
+import json
+import unittest
+from unittest import mock
+
+import requests
+
+from pipeline import panda
+from pipeline.panda import BatchEncoder, BatchSizer, call_with_retries
+
+# External ids and rows, some needing JSON escapes
+RECORDS = [
+    ("100000001", ["LEE", "JOSÉ", "", '1 "A" St', None]),
+    ("100000002", ["O’BRIEN", "Al\tB", "Q", "PO Box\\7", "33602"]),
+    ("100000003", [""] * 5),
+]
+
+
+def response(status_code):
+    """Return a requests.Response with just a status code."""
+    fake = requests.Response()
+    fake.status_code = status_code
+    return fake
+
+
+class BatchSizerTests(unittest.TestCase):
+    def sizer(self, size=1000):
+        return BatchSizer(size=size, floor=100, ceiling=5000, target=5)
+
+    def test_starting_size_is_clamped(self):
+        self.assertEqual(self.sizer(10).size, 100)
+        self.assertEqual(self.sizer(9000).size, 5000)
+
+    def test_fast_batches_grow_by_a_quarter(self):
+        sizer = self.sizer()
+        sizer.record(1000, 1, 0)
+        self.assertEqual(sizer.size, 1250)
+        sizer.record(1250, 2.4, 0)
+        self.assertEqual(sizer.size, 1562)
+
+    def test_slow_batches_shrink_toward_the_target(self):
+        sizer = self.sizer()
+        sizer.record(1000, 20, 0)
+        self.assertEqual(sizer.size, 250)
+
+    def test_batches_near_the_target_keep_their_size(self):
+        sizer = self.sizer()
+        for seconds in (2.5, 4, 5):
+            sizer.record(1000, seconds, 0)
+            self.assertEqual(sizer.size, 1000)
+
+    def test_retried_batches_halve(self):
+        sizer = self.sizer()
+        sizer.record(1000, 0.1, 1)
+        self.assertEqual(sizer.size, 500)
+
+    def test_size_stays_between_floor_and_ceiling(self):
+        sizer = self.sizer()
+        for _ in range(10):
+            sizer.record(sizer.size, 100, 2)
+        self.assertEqual(sizer.size, 100)
+        for _ in range(30):
+            sizer.record(sizer.size, 0.1, 0)
+        self.assertEqual(sizer.size, 5000)
+
+
+class BatchEncoderTests(unittest.TestCase):
+    def expected(self, records):
+        return json.dumps(
+            {
+                "objects": [
+                    {"external_id": external_id, "data": data}
+                    for external_id, data in records
+                ]
+            }
+        ).encode("utf-8")
+
+    def test_body_matches_json_dumps(self):
+        encoder = BatchEncoder(gzip_level=0)
+        self.assertEqual(encoder.headers, {})
+        for count in range(len(RECORDS) + 1):
+            for record in RECORDS[:count]:
+                encoder.add(*record)
+            self.assertEqual(encoder.rows, count)
+            self.assertEqual(encoder.take(), self.expected(RECORDS[:count]))
+            self.assertEqual(encoder.rows, 0)
+
+    def test_gzipped_body(self):
+        encoder = BatchEncoder(gzip_level=6)
+        self.assertEqual(encoder.headers, {"Content-Encoding": "gzip"})
+        for _ in range(2):  # the buffer is reused for the next batch
+            for record in RECORDS:
+                encoder.add(*record)
+            body = gzip.decompress(encoder.take())
+            self.assertEqual(body, self.expected(RECORDS))
+
+
+@mock.patch.object(panda.time, "sleep")
+class CallWithRetriesTests(unittest.TestCase):
+    def call(self, *outcomes, **kwargs):
+        """Run call_with_retries over a call that gives each outcome."""
+        fake = mock.Mock(side_effect=outcomes)
+        with mock.patch.object(panda, "PANDA_RETRIES", 2):
+            result = call_with_retries(fake, "url", **kwargs)
+        return result[1], fake.call_count
+
+    def test_success_needs_no_retry(self, sleep):
+        self.assertEqual(self.call(response(200)), (0, 1))
+        sleep.assert_not_called()
+
+    def test_retryable_failures_are_retried(self, sleep):
+        outcomes = [response(503), requests.ConnectionError(), response(200)]
+        self.assertEqual(self.call(*outcomes), (2, 3))
+        self.assertEqual(sleep.call_count, 2)
+
+    def test_other_errors_raise_right_away(self, sleep):
+        with self.assertRaises(requests.HTTPError):
+            self.call(response(400), response(200))
+        sleep.assert_not_called()
+
+    def test_retries_run_out(self, sleep):
+        with self.assertRaises(requests.HTTPError):
+            self.call(response(503), response(502), response(500))
+        with self.assertRaises(requests.Timeout):
+            self.call(*[requests.Timeout()] * 3)
+
+    def test_missing_ok(self, sleep):
+        self.assertEqual(self.call(response(404), missing_ok=True), (0, 1))
+        with self.assertRaises(requests.HTTPError):
+            self.call(response(404))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+import contextlib
+import csv
+import functools
+import io
+import tempfile
+import unittest
+from unittest import mock
+
+import load_county_voters as lcv
+import panda_standin
+from pipeline import panda
+
+COUNTY_FILE = "HIL.csv"
+
+
+def load_row(index):
+    """Return a prepped row for a made-up voter."""
+    row = [f"{name} {index}" for name in lcv.LOAD_COLUMNS]
+    row[lcv.VOTER_ID_INDEX] = str(100000000 + index)
+    return row
+
+
+class ExportTests(unittest.TestCase):
+    def setUp(self):
+        base = tempfile.TemporaryDirectory()
+        self.addCleanup(base.cleanup)
+        self.server = panda_standin.PandaStandIn().start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        patches = {
+            "LOADBASE": base.name,
+            "LOADED": base.name,
+            "PANDA_DATASET_BASE": f"{self.server.url}/api/1.0/dataset",
+        }
+        for name, value in patches.items():
+            patcher = mock.patch.object(lcv, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        # batches of ten rows, one in flight, so a failure lands mid-file
+        sizer = functools.partial(panda.BatchSizer, 10, 10, 10)
+        patcher = mock.patch.object(panda, "BatchSizer", sizer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write_load_file(self, rows):
+        with open(f"{lcv.LOADBASE}/{COUNTY_FILE}", "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(lcv.LOAD_COLUMNS)
+            writer.writerows(rows)
+
+    def export(self, **kwargs):
+        """Export the county; return the rows sent and the dataset."""
+        self.server.reset_stats()
+        with contextlib.redirect_stdout(io.StringIO()):
+            lcv.export_county(COUNTY_FILE, in_flight=1, **kwargs)
+        (dataset,) = self.server.datasets.values()
+        return self.server.summary()["rows"], dataset
+
+    def expected(self, rows):
+        return {
+            row[lcv.VOTER_ID_INDEX]: [row[i] for i in lcv.VOTER_ORDER]
+            for row in rows
+        }
+
+    def fail_after(self, puts):
+        """Make PUTs of data fail once puts of them have gone through."""
+        put = panda.put_with_retries
+        sent = []
+
+        def failing_put(url, *args):
+            if url.endswith("/data/"):
+                if len(sent) == puts:
+                    raise ConnectionError("dropped")
+                sent.append(url)
+            return put(url, *args)
+
+        return mock.patch.object(panda, "put_with_retries", failing_put)
+
+
+class CheckpointTests(ExportTests):
+    def checkpoint(self):
+        (slug,) = self.server.datasets
+        return lcv.read_checkpoint(slug)
+
+    def test_resume_picks_up_after_the_last_acknowledged_row(self):
+        rows = [load_row(index) for index in range(45)]
+        self.write_load_file(rows)
+        with self.fail_after(2), self.assertRaises(ConnectionError):
+            self.export(resume=False)
+        self.assertEqual(self.checkpoint()["rows"], 20)
+        self.assertFalse(self.checkpoint()["complete"])
+        sent, dataset = self.export(resume=True)
+        self.assertEqual(sent, 25)
+        self.assertEqual(dataset, self.expected(rows))
+        self.assertEqual(self.checkpoint()["rows"], 45)
+        self.assertTrue(self.checkpoint()["complete"])
+
+    def test_finished_export_is_skipped(self):
+        self.write_load_file([load_row(index) for index in range(15)])
+        self.export(resume=False)
+        self.assertEqual(self.export(resume=True)[0], 0)
+        self.assertEqual(self.server.summary()["requests"], 0)
+
+    def test_changed_load_file_starts_over(self):
+        self.write_load_file([load_row(index) for index in range(30)])
+        with self.fail_after(1), self.assertRaises(ConnectionError):
+            self.export(resume=False)
+        rows = [load_row(index) for index in range(31)]
+        self.write_load_file(rows)
+        sent, dataset = self.export(resume=True)
+        self.assertEqual(sent, 31)
+        self.assertEqual(dataset, self.expected(rows))
+
+    def test_without_resume_everything_is_sent(self):
+        rows = [load_row(index) for index in range(15)]
+        self.write_load_file(rows)
+        self.export(resume=False)
+        self.assertEqual(self.export(resume=False)[0], 15)
+
+
+class DeltaTests(ExportTests):
+    def fingerprints(self):
+        (slug,) = self.server.datasets
+        return lcv.read_fingerprints(slug)
+
+    def test_only_changes_are_sent(self):
+        rows = [load_row(index) for index in range(25)]
+        self.write_load_file(rows)
+        self.export(delta=False)
+        self.assertEqual(len(self.fingerprints()), 25)
+        rows[3][0] = "MOVED"  # changed
+        del rows[7]  # gone
+        rows.append(load_row(99))  # new
+        self.write_load_file(rows)
+        sent, dataset = self.export(delta=True)
+        self.assertEqual(sent, 2)
+        self.assertEqual(dataset, self.expected(rows))
+        deletes = [s for s in self.server.stats if s[0] == "DELETE"]
+        self.assertEqual(len(deletes), 1)
+        self.assertEqual(
+            self.fingerprints(),
+            {
+                row[lcv.VOTER_ID_INDEX]: lcv.fingerprint_row(row)
+                for row in rows
+            },
+        )
+
+    def test_unchanged_county_sends_nothing(self):
+        self.write_load_file([load_row(index) for index in range(15)])
+        self.export(delta=False)
+        self.assertEqual(self.export(delta=True)[0], 0)
+
+    def test_first_delta_sends_everything(self):
+        rows = [load_row(index) for index in range(15)]
+        self.write_load_file(rows)
+        sent, dataset = self.export(delta=True)
+        self.assertEqual(sent, 15)
+        self.assertEqual(dataset, self.expected(rows))
+        self.assertEqual(len(self.fingerprints()), 15)
+
+    def test_fingerprints_cover_every_column(self):
+        row = load_row(1)
+        for column in range(len(row)):
+            changed = list(row)
+            changed[column] += "!"
+            self.assertNotEqual(
+                lcv.fingerprint_row(changed), lcv.fingerprint_row(row)
+            )
+        # values can't run together across the column separator
+        self.assertNotEqual(
+            lcv.fingerprint_row(["ab", "c"]), lcv.fingerprint_row(["a", "bc"])
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
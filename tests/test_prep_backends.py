@@ -0,0 +1,144 @@
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+import load_county_voters as lcv
+from pipeline import parquet_rows
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+with open(lcv.HEADER_FILE) as header_file:
+    RAW_HEADER = header_file.readline().rstrip("\n").split("\t")
+
+# Values that clean_row() strips, collapses, translates or sorts oddly
+NAMES = ["Lee", "Lee Jr", "Leé", "LEE", " Lee ", "", "Émile", "O’Brien", "Zed"]
+ADDRESSES = [
+    "123  Main   St ",
+    "1 A St, Apt 2",
+    "   ",
+    "12\xa0Oak Ave",
+    "9\x0bElm\x1cRd\x85",
+    "PO Box 7",
+]
+CODES = {
+    "race": ["1", "3", "5", "9", "X", ""],
+    "party": ["DEM", "REP", "NPA", "XYZ", ""],
+    "suppress": ["Y", "N", ""],
+    "VoterStatus": ["ACT", "INA", ""],
+}
+
+
+def raw_line(**values):
+    """Return a raw county file line, with values given by header name."""
+    return "\t".join(values.get(name, "") for name in RAW_HEADER)
+
+
+def random_lines(count, seed=0):
+    """Return raw lines drawn from the edge values above, some repeated."""
+    chooser = random.Random(seed)
+    lines = []
+    for index in range(count):
+        values = {
+            "county": "TST",
+            "voter_ID": f" {100000000 + index % (count // 2)} ",
+            "lname": chooser.choice(NAMES),
+            "fname": chooser.choice(NAMES),
+            "mname": chooser.choice(["Q", " ", ""]),
+            "addr1": chooser.choice(ADDRESSES),
+            "city": chooser.choice(["Tampa", " Tampa", "Tampa,FL"]),
+            "zip": "33602",
+            "gender": chooser.choice(["F", "M", " U"]),
+            "birthdate": "01/02/1970",
+            "RegDate": " 03/04/2000",
+            "areacode": "813",
+            "email": "a@b.c",
+        }
+        for name, codes in CODES.items():
+            values[name] = chooser.choice(codes)
+        lines.append(raw_line(**values))
+    return lines
+
+
+@unittest.skipUnless(pyarrow, "the arrow backend needs pyarrow")
+class PrepBackendTests(unittest.TestCase):
+    def setUp(self):
+        base = tempfile.TemporaryDirectory()
+        self.addCleanup(base.cleanup)
+        for name in ("RAWBASE", "TEMP", "LOADBASE"):
+            path = os.path.join(base.name, name)
+            os.mkdir(path)
+            patcher = mock.patch.object(lcv, name, path)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def write_raw(self, lines, newline="\n"):
+        with open(f"{lcv.RAWBASE}/TST_20240101.txt", "w", newline="") as f:
+            f.write("".join(line + newline for line in lines))
+        return "TST_20240101.txt"
+
+    def prep_both(self, filename, prep_format="csv", chunk_size=64):
+        """Prep a raw file with each backend, returning both load files."""
+        outputs = []
+        for backend in ("python", "arrow"):
+            with mock.patch.object(lcv, "PREP_SORT_CHUNK_ROWS", chunk_size):
+                lcv.prep(filename, backend=backend, prep_format=prep_format)
+            path = lcv.load_path("TST", prep_format)
+            if prep_format == "csv":
+                with open(path, "rb") as load_file:
+                    outputs.append(load_file.read())
+            else:
+                outputs.append(list(parquet_rows(path)))
+        self.assertEqual(os.listdir(lcv.TEMP), [])
+        return outputs
+
+    def test_identical_csv(self):
+        filename = self.write_raw(random_lines(500))
+        for chunk_size in (64, 500, 1000):
+            python, arrow = self.prep_both(filename, chunk_size=chunk_size)
+            self.assertEqual(python.count(b"\r\n"), 501)
+            self.assertEqual(python, arrow)
+
+    def test_identical_parquet(self):
+        filename = self.write_raw(random_lines(300))
+        python, arrow = self.prep_both(filename, prep_format="parquet")
+        self.assertEqual(len(python), 300)
+        self.assertEqual(python, arrow)
+
+    def test_blank_and_crlf_lines(self):
+        lines = random_lines(200)
+        lines[50:50] = ["", ""]
+        filename = self.write_raw(lines + [""], newline="\r\n")
+        python, arrow = self.prep_both(filename)
+        self.assertEqual(python, arrow)
+
+    def test_fallback_to_rows(self):
+        # quotes, NULs and short rows go down the row-by-row path
+        for odd_line in (
+            raw_line(lname='"Quoted, Name"', fname="Al", addr1='5 "B" St'),
+            raw_line(lname="Nul\x00l", fname="\x00"),
+            "TST\t100\tShort",
+        ):
+            with self.subTest(odd_line=odd_line):
+                lines = random_lines(300)
+                lines.insert(150, odd_line)
+                filename = self.write_raw(lines)
+                python, arrow = self.prep_both(filename)
+                self.assertEqual(python, arrow)
+
+    def test_unsorted_rows(self):
+        filename = self.write_raw(random_lines(300))
+        python, arrow = [
+            sorted(lcv.prepped_rows(filename, backend=backend, sort=False))
+            for backend in ("python", "arrow")
+        ]
+        self.assertEqual(len(python), 300)
+        self.assertEqual(python, arrow)
+
+
+if __name__ == "__main__":
+    unittest.main()
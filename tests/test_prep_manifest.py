@@ -0,0 +1,129 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import load_county_voters as lcv
+
+
+class PrepManifestTests(unittest.TestCase):
+    def setUp(self):
+        base = tempfile.TemporaryDirectory()
+        self.addCleanup(base.cleanup)
+        yearbase = os.path.join(base.name, "2024")
+        dirs = [
+            "RAWBASE",
+            "HISTBASE",
+            "LOADBASE",
+            "LOADED",
+            "PREPBASE",
+            "TEMP",
+        ]
+        paths = {name: os.path.join(yearbase, name) for name in dirs}
+        paths["YEARBASE"] = yearbase
+        paths["WORKING_DIRS"] = [paths[name] for name in dirs]
+        paths["PREP_MANIFEST"] = os.path.join(yearbase, "manifest.json")
+        paths["PREP_DEDUP"] = False
+        paths["prep"] = mock.Mock(side_effect=self.fake_prep)
+        for name, value in paths.items():
+            patcher = mock.patch.object(lcv, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        lcv.prep_directories()
+        self.failing = set()
+
+    def fake_prep(self, filename):
+        """Stand in for prep(), writing just the county's load file."""
+        if filename in self.failing:
+            raise ValueError(filename)
+        with open(lcv.load_path(filename[:3]), "w") as load_file:
+            load_file.write(filename)
+
+    def write_raw(self, filename, text="voters\n"):
+        with open(f"{lcv.RAWBASE}/{filename}", "w") as raw_file:
+            raw_file.write(text)
+
+    def prep_files(self, full=False):
+        """Run prep_files(), returning the raw files it prepped."""
+        lcv.prep.reset_mock()
+        with contextlib.redirect_stdout(io.StringIO()):
+            failures = lcv.prep_files(workers=1, full=full)
+        self.assertEqual(set(failures), self.failing)
+        return sorted(call.args[0] for call in lcv.prep.call_args_list)
+
+    def test_unchanged_counties_are_skipped(self):
+        self.write_raw("HIL_20240101.txt")
+        self.write_raw("PIN_20240101.txt")
+        self.write_raw("XXX_20240101.txt")  # not a county
+        both = ["HIL_20240101.txt", "PIN_20240101.txt"]
+        self.assertEqual(self.prep_files(), both)
+        self.assertEqual(sorted(lcv.read_manifest()), both)
+        self.assertEqual(self.prep_files(), [])
+
+    def test_changed_raw_file_is_prepped(self):
+        self.write_raw("HIL_20240101.txt")
+        self.write_raw("PIN_20240101.txt")
+        self.prep_files()
+        self.write_raw("PIN_20240101.txt", "more voters\n")
+        self.assertEqual(self.prep_files(), ["PIN_20240101.txt"])
+
+    def test_touched_raw_file_is_rehashed_not_prepped(self):
+        self.write_raw("HIL_20240101.txt")
+        self.prep_files()
+        path = f"{lcv.RAWBASE}/HIL_20240101.txt"
+        stat = os.stat(path)
+        os.utime(path, (stat.st_atime, stat.st_mtime + 60))
+        self.assertEqual(self.prep_files(), [])
+        entry = lcv.read_manifest()["HIL_20240101.txt"]
+        self.assertEqual(entry["mtime"], stat.st_mtime + 60)
+
+    def test_missing_load_file_is_prepped(self):
+        self.write_raw("HIL_20240101.txt")
+        self.prep_files()
+        os.remove(lcv.load_path("HIL"))
+        self.assertEqual(self.prep_files(), ["HIL_20240101.txt"])
+
+    def test_new_prep_version_preps_everything(self):
+        self.write_raw("HIL_20240101.txt")
+        self.write_raw("PIN_20240101.txt")
+        self.prep_files()
+        with mock.patch.object(lcv, "PREP_CODE_VERSION", -1):
+            self.assertEqual(len(self.prep_files()), 2)
+
+    def test_full_preps_everything(self):
+        self.write_raw("HIL_20240101.txt")
+        self.write_raw("PIN_20240101.txt")
+        self.prep_files()
+        self.assertEqual(len(self.prep_files(full=True)), 2)
+
+    def test_failed_county_is_retried(self):
+        self.write_raw("HIL_20240101.txt")
+        self.write_raw("PIN_20240101.txt")
+        self.failing = {"PIN_20240101.txt"}
+        self.prep_files()
+        self.assertEqual(list(lcv.read_manifest()), ["HIL_20240101.txt"])
+        self.failing = set()
+        self.assertEqual(self.prep_files(), ["PIN_20240101.txt"])
+
+    def test_removed_county_loses_its_load_file(self):
+        self.write_raw("HIL_20240101.txt")
+        self.write_raw("PIN_20240101.txt")
+        self.prep_files()
+        os.remove(f"{lcv.RAWBASE}/PIN_20240101.txt")
+        self.assertEqual(self.prep_files(), [])
+        self.assertFalse(os.path.exists(lcv.load_path("PIN")))
+        self.assertTrue(os.path.exists(lcv.load_path("HIL")))
+
+    def test_new_disk_keeps_the_county_load_file_until_prepped(self):
+        self.write_raw("HIL_20240101.txt")
+        self.prep_files()
+        os.remove(f"{lcv.RAWBASE}/HIL_20240101.txt")
+        self.write_raw("HIL_20240201.txt")
+        self.assertEqual(self.prep_files(), ["HIL_20240201.txt"])
+        self.assertTrue(os.path.exists(lcv.load_path("HIL")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+
+from pipeline import ArrowCSVSink, CSVSink, ParquetSink, run_pipeline
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+ROWS = [["Lee", "Ana"], ["Peña", "José, Jr"], ["O'Brien", 'Al "Bud"']]
+
+
+def fail_on(item, bad):
+    """A transform that raises on one item, as a prep failing partway."""
+    if item == bad:
+        raise ValueError(item)
+    return item
+
+
+class FileSinkTests(unittest.TestCase):
+    def setUp(self):
+        base = tempfile.TemporaryDirectory()
+        self.addCleanup(base.cleanup)
+        self.path = os.path.join(base.name, "HIL.csv")
+
+    def assert_removed_on_failure(self, sink, source):
+        with self.assertRaises(ValueError):
+            run_pipeline(
+                source, sink, transform=lambda item: fail_on(item, source[-1])
+            )
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_csv_written(self):
+        run_pipeline(ROWS, CSVSink(self.path, header=["lname", "fname"]))
+        with open(self.path, newline="") as f:
+            self.assertEqual(
+                f.read(),
+                'lname,fname\r\nLee,Ana\r\nPeña,"José, Jr"\r\n'
+                'O\'Brien,"Al ""Bud"""\r\n',
+            )
+
+    def test_csv_removed_on_failure(self):
+        sink = CSVSink(self.path, header=["lname", "fname"])
+        sink.batch_size = 1  # so some rows are written before the failure
+        self.assert_removed_on_failure(sink, ROWS)
+
+    @unittest.skipUnless(pyarrow, "needs pyarrow")
+    def test_arrow_csv_matches_csv(self):
+        run_pipeline(ROWS, CSVSink(self.path, header=["lname", "fname"]))
+        with open(self.path, "rb") as f:
+            expected = f.read()
+        batch = pyarrow.RecordBatch.from_arrays(
+            [pyarrow.array(column) for column in zip(*ROWS)],
+            names=["lname", "fname"],
+        )
+        run_pipeline([batch], ArrowCSVSink(self.path, ["lname", "fname"]))
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), expected)
+
+    @unittest.skipUnless(pyarrow, "needs pyarrow")
+    def test_arrow_csv_removed_on_failure(self):
+        batches = [
+            pyarrow.RecordBatch.from_arrays(
+                [pyarrow.array([row[0]]), pyarrow.array([row[1]])],
+                names=["lname", "fname"],
+            )
+            for row in ROWS
+        ]
+        self.assert_removed_on_failure(ArrowCSVSink(self.path), batches)
+
+    @unittest.skipUnless(pyarrow, "needs pyarrow")
+    def test_parquet_removed_on_failure(self):
+        self.path = self.path.replace(".csv", ".parquet")
+        sink = ParquetSink(self.path, ["lname", "fname"], batch_size=1)
+        self.assert_removed_on_failure(sink, ROWS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import codecs
+import os
+import random
+import tempfile
+import unittest
+
+from pipeline.text import RepairedText, repair_line, sniff_encoding
+
+# Clean names and addresses, as they appear in voter and citation files
+CLEAN = [
+    "ANDRÉ’S PLACE",
+    "JOSÉ–LUIS",
+    "JOÃO",
+    "SÃO PAULO",
+    "ÅSA LINDSTRÖM",
+    "CAFÉ “CUBANO” — YBOR",
+    "MUÑOZ, MARÍA JOSÉ",
+    "O’BRIEN",
+]
+# Double-encoded text, and what it should be repaired to
+MOJIBAKE = [
+    ("JOSÃ‰", "JOSÉ"),
+    ("MUÃ‘OZ", "MUÑOZ"),
+    ("donâ€™t", "don’t"),
+    ("CAFÃ©", "CAFé"),
+    ("Ã\x89LISE", "ÉLISE"),  # read as latin-1
+    ("﻿ID,Name", "ID,Name"),
+    ("caf\udce9", "café"),  # an undecodable cp1252 byte
+]
+
+
+def write_temp(test, data):
+    """Write bytes to a temporary file, removed after the test."""
+    handle, path = tempfile.mkstemp()
+    with os.fdopen(handle, "wb") as f:
+        f.write(data)
+    test.addCleanup(os.remove, path)
+    return path
+
+
+class RepairLineTests(unittest.TestCase):
+    def test_clean_text_is_untouched(self):
+        for line in CLEAN:
+            self.assertEqual(repair_line(line), line)
+
+    def test_mojibake_is_repaired(self):
+        for line, expected in MOJIBAKE:
+            self.assertEqual(repair_line(line), expected)
+
+    def test_fuzzed_clean_utf8_is_untouched(self):
+        rng = random.Random(20)
+        alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ ,.-'ÁÉÍÓÚÑÜÇÀÈÖéíóúñ’–—“”"
+        for _ in range(3000):
+            line = "".join(rng.choice(alphabet) for _ in range(40))
+            self.assertEqual(repair_line(line), line)
+
+
+class RepairedTextTests(unittest.TestCase):
+    def test_clean_utf8_file_is_read_as_is(self):
+        text = "\n".join(CLEAN * 50) + "\n"
+        path = write_temp(self, text.encode("utf-8"))
+        lines = RepairedText(path, block_size=64)
+        self.assertEqual("".join(lines), text)
+        self.assertEqual(lines.repaired, 0)
+
+    def test_counts_only_changed_lines(self):
+        text = "\n".join(
+            line
+            for line, _expected in MOJIBAKE[:4] + [("ANDRÉ’S PLACE", None)]
+        )
+        path = write_temp(self, codecs.BOM_UTF8 + text.encode("utf-8"))
+        self.assertEqual(sniff_encoding(path), "utf-8-sig")
+        lines = RepairedText(path)
+        self.assertEqual(
+            list(lines),
+            ["JOSÉ\n", "MUÑOZ\n", "don’t\n", "CAFé\n", "ANDRÉ’S PLACE"],
+        )
+        self.assertEqual(lines.repaired, 4)
+
+    def test_cp1252_file(self):
+        path = write_temp(self, "CAFÉ “CUBANO”\r\n".encode("cp1252"))
+        self.assertEqual(sniff_encoding(path), "cp1252")
+        self.assertEqual(list(RepairedText(path)), ["CAFÉ “CUBANO”\r\n"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,326 @@
+#!/usr/bin/env python
+"""
+Throughput benchmarks for the voter loader.
+
+Uses the same env vars as load_county_voters.py; generate_voter_disk.py
+can fill /VoterDetail with synthetic county files to run them against.
+Usage:
+
+python benchmarks.py prep_backends BAY_20190312.txt
+python benchmarks.py prep_formats BAY_20190312.txt
+python benchmarks.py suite [RAW FILE] [--json=results.json]
+python benchmarks.py export [LOAD FILE] [--tickets=CITATIONS.csv]
+"""
+
+import filecmp
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import time
+
+import load_county_voters as lcv
+import panda_standin
+
+PREP_BACKENDS = ["python", "arrow"]
+# Each stage repeats the ones before it, since it starts from the raw file
+SUITE_STAGES = ["stage", "prep", "sort", "write_csv", "copy"]
+BENCHMARK_DB = os.getenv("BENCHMARK_DB", "voter_benchmark")
+EXPORT_LOADED = f"{lcv.TEMP}/benchmark_loaded"  # export_county's LOADED
+CITATIONS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "citations"
+)
+
+
+def count_raw_rows(filename):
+    """Count the non-blank lines in a raw county file."""
+    with open(f"{lcv.RAWBASE}/{filename}", "rb") as raw_file:
+        return sum(1 for line in raw_file if line.strip())
+
+
+def benchmark_prep_backends(filename, backends=None):
+    """
+    Prep one raw county file with each backend and compare rows/sec.
+
+    Each backend's load file is kept in TEMP, and all of them are checked
+    for byte-identical output against the first backend's.
+    """
+    if not backends:
+        backends = PREP_BACKENDS
+    lcv.prep_directories(keep_loads=True)
+    slug = filename[:3]
+    rows = count_raw_rows(filename)
+    results = {}
+    for backend in backends:
+        start = time.perf_counter()
+        lcv.prep(filename, backend=backend, prep_format="csv")
+        elapsed = time.perf_counter() - start
+        kept = f"{lcv.TEMP}/{slug}_{backend}.csv"
+        shutil.copy(f"{lcv.LOADBASE}/{slug}.csv", kept)
+        results[backend] = (elapsed, kept)
+    baseline = results[backends[0]][1]
+    print(f"{filename}: {rows} rows")
+    for backend, (elapsed, kept) in results.items():
+        identical = filecmp.cmp(baseline, kept, shallow=False)
+        print(
+            f"{backend:>8}: {elapsed:.2f}s, {rows / elapsed:,.0f} rows/sec, "
+            f"{'identical' if identical else 'DIFFERENT'} output"
+        )
+    for elapsed, kept in results.values():
+        os.remove(kept)
+    return results
+
+
+def benchmark_prep_formats(filename):
+    """
+    Prep one raw county file in each load file format and compare them.
+
+    Reports each load file's size, how long prep took to write it and
+    how long reading its rows back takes, as the loaders read them.
+    The PREP_FORMAT file is prepped last, so it's the one left in place.
+    """
+    lcv.prep_directories(keep_loads=True)
+    slug = filename[:3]
+    formats = sorted(lcv.PREP_FORMATS, key=lambda f: f == lcv.PREP_FORMAT)
+    results = {}
+    for prep_format in formats:
+        start = time.perf_counter()
+        lcv.prep(filename, prep_format=prep_format)
+        write_seconds = time.perf_counter() - start
+        path = lcv.load_path(slug, prep_format)
+        start = time.perf_counter()
+        rows = sum(1 for row in lcv.load_file_rows(os.path.basename(path)))
+        read_seconds = time.perf_counter() - start
+        results[prep_format] = {
+            "rows": rows,
+            "mb": round(os.path.getsize(path) / 1024 / 1024, 1),
+            "write_seconds": round(write_seconds, 2),
+            "read_seconds": round(read_seconds, 2),
+        }
+    print(f"{filename}: {rows} rows")
+    for prep_format, result in results.items():
+        print(
+            "{:>8}: {mb:>7} MB, written in {write_seconds:.2f}s, "
+            "read back in {read_seconds:.2f}s".format(prep_format, **result)
+        )
+    return results
+
+
+def run_stage(stage, filenames):
+    """
+    Run one suite stage over raw county files and return the row count.
+
+    - stage: copy, add a header and csvcut each file (PREP_STREAMING=0)
+    - prep: read and clean each file's rows
+    - sort: prep, plus the external sort
+    - write_csv: a full prep(), writing the LOADBASE CSV
+    - copy: prep and COPY each file's rows into BENCHMARK_DB
+    """
+    rows = 0
+    if stage == "copy":
+        connection = lcv.connect_postgres(BENCHMARK_DB)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("TRUNCATE voters_voter")
+            connection.commit()
+            for filename in filenames:
+                rows += lcv.copy_county_rows(connection, filename)
+        finally:
+            connection.close()
+        return rows
+    for filename in filenames:
+        slug = filename[:3]
+        if stage == "stage":
+            with open(lcv.stage_local_files(filename, slug), "r") as f:
+                rows += sum(1 for line in f) - 1
+        elif stage == "prep":
+            rows += sum(1 for row in lcv.prepped_rows(filename, sort=False))
+        elif stage == "sort":
+            rows += sum(1 for row in lcv.prepped_rows(filename))
+        elif stage == "write_csv":
+            lcv.prep(filename, prep_format="csv")
+            with open(f"{lcv.LOADBASE}/{slug}.csv", "r") as f:
+                rows += sum(1 for line in f) - 1
+    return rows
+
+
+def timed_stage(stage, filenames):
+    """Run a stage in a fresh process; return rows, seconds and peak RSS."""
+    start = time.perf_counter()
+    rows = run_stage(stage, filenames)
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rows, elapsed, peak_kb
+
+
+def benchmark_suite(filename=None, json_path=None):
+    """
+    Time each stage of the voter pipeline and report its throughput.
+
+    Runs every stage in its own spawned process, so each stage's peak RSS
+    is its own, over one raw file or every county file in /VoterDetail.
+    Results can also be written to json_path, to track them over time.
+    """
+    if filename:
+        filenames = [filename]
+    else:
+        filenames = sorted(
+            f for f in lcv.no_dotfiles(lcv.RAWBASE) if f[:3] in lcv.FL_COUNTIES
+        )
+    lcv.prep_directories(keep_loads=True)
+    stages = list(SUITE_STAGES)
+    try:
+        lcv.create_postgres_db(BENCHMARK_DB)
+        lcv.connect_postgres(BENCHMARK_DB).close()
+    except Exception as e:
+        print(f"Skipping the copy stage; no database to load ({e})")
+        stages.remove("copy")
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for stage in stages:
+        with context.Pool(1) as pool:
+            rows, elapsed, peak_kb = pool.apply(
+                timed_stage, (stage, filenames)
+            )
+        lcv.purge_directories(dirs=[lcv.PREPBASE, lcv.TEMP])
+        results.append(
+            {
+                "stage": stage,
+                "rows": rows,
+                "seconds": round(elapsed, 3),
+                "rows_per_sec": round(rows / elapsed) if elapsed else None,
+                "peak_rss_mb": round(peak_kb / 1024, 1),
+            }
+        )
+    print(f"{len(filenames)} county files")
+    print(f"{'stage':>10} {'rows':>10} {'seconds':>9} {'rows/sec':>10} RSS MB")
+    for result in results:
+        print(
+            "{stage:>10} {rows:>10} {seconds:>9.2f} "
+            "{rows_per_sec:>10,} {peak_rss_mb:>6}".format(**result)
+        )
+    if json_path:
+        with open(json_path, "w") as json_file:
+            json.dump(results, json_file, indent=2)
+    return results
+
+
+def timed_export(loader, path, in_flight):
+    """
+    Run one export against the stand-in; return rows and seconds.
+
+    Runs in a fresh process, so the loaders pick up the stand-in's URL
+    from PANDA_BASE and PANDA_BASE_URL at import. Voter checkpoints and
+    fingerprints go to TEMP rather than the real LOADED directory.
+    """
+    start = time.perf_counter()
+    if loader == "export_county":
+        lcv.LOADED = EXPORT_LOADED
+        os.makedirs(lcv.LOADED, exist_ok=True)
+        rows = lcv.export_county(path, in_flight=in_flight)
+    else:
+        sys.path.insert(0, CITATIONS_DIR)
+        import load_tampa_bike_citations as citations
+
+        citations.initialize_dataset()
+        citations.load_tickets(path)
+        rows = citations.RUNVARS.created
+    return rows, time.perf_counter() - start
+
+
+def benchmark_export(filename=None, tickets=None, json_path=None):
+    """
+    Drive the PANDA exporters against a local stand-in and time them.
+
+    Exports one prepped county file (the largest in LOADBASE by default)
+    with export_county, and a citations CSV with load_tickets if given.
+    The stand-in's --latency, --error-rate and --rows-per-sec flags shape
+    its responses; --in-flight and the PANDA_ batch and retry env vars
+    tune the exporters. Reports rows/sec, retried requests and batch
+    latency percentiles as the stand-in saw them.
+    """
+    if not filename:
+        filename = max(
+            (
+                f
+                for f in lcv.no_dotfiles(lcv.LOADBASE)
+                if f[:3] in lcv.FL_COUNTIES
+            ),
+            key=lambda f: os.path.getsize(f"{lcv.LOADBASE}/{f}"),
+        )
+    runs = [("export_county", filename)]
+    if tickets:
+        runs.append(("load_tickets", os.path.abspath(tickets)))
+    in_flight = int(lcv.get_option("in-flight", lcv.PANDA_IN_FLIGHT))
+    server = panda_standin.PandaStandIn(
+        latency=float(lcv.get_option("latency", "0.05")),
+        error_rate=float(lcv.get_option("error-rate", "0")),
+        rows_per_sec=float(lcv.get_option("rows-per-sec", "0")),
+    ).start()
+    os.environ["PANDA_BASE"] = server.url
+    os.environ["PANDA_BASE_URL"] = server.url
+    lcv.prep_directories(keep_loads=True)
+    results = []
+    context = multiprocessing.get_context("spawn")
+    try:
+        for loader, path in runs:
+            server.reset_stats()
+            with context.Pool(1) as pool:
+                rows, elapsed = pool.apply(
+                    timed_export, (loader, path, in_flight)
+                )
+            result = {"loader": loader, "rows": rows}
+            result["seconds"] = round(elapsed, 3)
+            result["rows_per_sec"] = round(rows / elapsed) if elapsed else None
+            result.update(server.summary())
+            results.append(result)
+    finally:
+        server.shutdown()
+        shutil.rmtree(EXPORT_LOADED, ignore_errors=True)
+    print(
+        f"{'loader':>13} {'rows':>8} {'seconds':>8} {'rows/sec':>9} "
+        f"{'batches':>7} {'retries':>7} {'p50 ms':>7} {'p99 ms':>7}"
+    )
+    for result in results:
+        print(
+            "{loader:>13} {rows:>8} {seconds:>8.2f} {rows_per_sec:>9,} "
+            "{batches:>7} {retries:>7} {p50_ms:>7.0f} {p99_ms:>7.0f}".format(
+                **result
+            )
+        )
+    if json_path:
+        with open(json_path, "w") as json_file:
+            json.dump(results, json_file, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if len(args) == 2 and args[0] == "prep_backends":
+        benchmark_prep_backends(args[1])
+    elif len(args) == 2 and args[0] == "prep_formats":
+        benchmark_prep_formats(args[1])
+    elif args and args[0] == "suite":
+        benchmark_suite(
+            args[1] if len(args) > 1 else None,
+            json_path=lcv.get_option("json"),
+        )
+    elif args and args[0] == "export":
+        benchmark_export(
+            args[1] if len(args) > 1 else None,
+            tickets=lcv.get_option("tickets"),
+            json_path=lcv.get_option("json"),
+        )
+    else:
+        print(
+            "Please provide one of these benchmarks: \n"
+            "• prep_backends [RAW FILE] (python vs. arrow prep)\n"
+            "• prep_formats [RAW FILE] (csv vs. parquet load files)\n"
+            "• suite [RAW FILE] (stage, prep, sort, write_csv and copy,\n"
+            "  over one raw file or all of them; add --json=PATH to save)\n"
+            "• export [LOAD FILE] (export_county against a local PANDA\n"
+            "  stand-in; add --tickets=CSV to time load_tickets too, and\n"
+            "  --latency=S, --error-rate=P or --rows-per-sec=N to shape it)"
+        )
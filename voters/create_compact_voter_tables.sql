@@ -0,0 +1,6 @@
+BEGIN;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE TABLE "voters_race" ("id" smallint NOT NULL PRIMARY KEY, "label" varchar(255) NOT NULL UNIQUE);
+CREATE TABLE "voters_party" ("id" smallserial NOT NULL PRIMARY KEY, "label" varchar(255) NOT NULL UNIQUE);
+CREATE TABLE "voters_voter" ("id" serial NOT NULL PRIMARY KEY, "voter_id" integer NOT NULL, "birthdate" date, "registration_date" date, "race" smallint, "party" smallint, "exemption_requested" boolean, "active" boolean, "gender" char(1), "county_slug" char(3), "areacode" varchar(255), "zipcode" varchar(255), "lname" varchar(255), "fname" varchar(255), "mname" varchar(255), "suffix" varchar(255), "addr1" varchar(255), "addr2" varchar(255), "city" varchar(255), "phone" varchar(255), "email" varchar(255), "search_name" varchar(255));
+COMMIT;
@@ -0,0 +1,4 @@
+BEGIN;
+CREATE TABLE "voters_voterhistory" ("voter_id" varchar(255) NOT NULL, "county_slug" varchar(255) NOT NULL, "election_date" date, "election_type" varchar(255), "history_code" varchar(255), "history" varchar(255)) PARTITION BY RANGE ("election_date");
+CREATE TABLE "voters_voterhistory_default" PARTITION OF "voters_voterhistory" DEFAULT;
+COMMIT;
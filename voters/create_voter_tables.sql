@@ -1,5 +1,6 @@
 BEGIN;
-CREATE TABLE "voters_voter" ("id" serial NOT NULL PRIMARY KEY, "lname" varchar(255) NOT NULL, "fname" varchar(255) NOT NULL, "mname" varchar(255) NOT NULL, "suffix" varchar(255) NOT NULL, "addr1" varchar(255) NOT NULL, "addr2" varchar(255) NOT NULL, "city" varchar(255) NOT NULL, "zipcode" varchar(255) NOT NULL, "gender" varchar(255) NOT NULL, "race" varchar(255) NOT NULL, "birthdate" varchar(255) NOT NULL, "party" varchar(255) NOT NULL, "areacode" varchar(255) NOT NULL, "phone" varchar(255) NOT NULL, "email" varchar(255) NOT NULL, "voter_id" varchar(255) NOT NULL, "exemption_requested" boolean, "registration_date" date, "active" boolean, "county_slug" varchar(255) NOT NULL);
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE TABLE "voters_voter" ("id" serial NOT NULL PRIMARY KEY, "lname" varchar(255) NOT NULL, "fname" varchar(255) NOT NULL, "mname" varchar(255) NOT NULL, "suffix" varchar(255) NOT NULL, "addr1" varchar(255) NOT NULL, "addr2" varchar(255) NOT NULL, "city" varchar(255) NOT NULL, "zipcode" varchar(255) NOT NULL, "gender" varchar(255) NOT NULL, "race" varchar(255) NOT NULL, "birthdate" varchar(255) NOT NULL, "party" varchar(255) NOT NULL, "areacode" varchar(255) NOT NULL, "phone" varchar(255) NOT NULL, "email" varchar(255) NOT NULL, "voter_id" varchar(255) NOT NULL, "exemption_requested" boolean, "registration_date" date, "active" boolean, "county_slug" varchar(255) NOT NULL, "search_name" varchar(255));
 ALTER TABLE "voters_voter" ALTER COLUMN "addr1" DROP NOT NULL;
 ALTER TABLE "voters_voter" ALTER COLUMN "addr2" DROP NOT NULL;
 ALTER TABLE "voters_voter" ALTER COLUMN "areacode" DROP NOT NULL;
@@ -0,0 +1,7 @@
+BEGIN;
+ALTER TABLE "voters_voter" ADD COLUMN "row_hash" varchar(32);
+ALTER TABLE "voters_voter" ADD COLUMN "source_date" date;
+CREATE TABLE "voters_voterchange" ("id" serial NOT NULL PRIMARY KEY, "voter_id" varchar(255) NOT NULL, "county_slug" varchar(255), "change_type" varchar(1) NOT NULL, "source_date" date NOT NULL);
+CREATE INDEX "voters_voterchange_voter_id" ON "voters_voterchange" ("voter_id");
+CREATE INDEX "voters_voterchange_source_date" ON "voters_voterchange" ("source_date");
+COMMIT;
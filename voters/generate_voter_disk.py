@@ -0,0 +1,324 @@
+#!/usr/bin/env python
+"""
+Generate a synthetic Florida voter disk for testing and benchmarks.
+
+Writes tab-delimited county files in the raw VoterDetail layout
+(see HEADER.txt) to the RAWBASE directory that load_county_voters.py uses,
+named for VOTER_DATA_DATE. Rows use the real race and party codes, and
+counties are sized in proportion to their real registered-voter counts.
+Usage:
+
+python generate_voter_disk.py 14000000  # roughly statewide
+python generate_voter_disk.py 500000 --counties=HIL,PIN,PAS --seed=7
+"""
+
+import os
+import random
+import sys
+from itertools import accumulate
+
+import load_county_voters as lcv
+
+# Approximate registered voters per county, in thousands
+COUNTY_WEIGHTS = {
+    "ALA": 190,
+    "BAK": 19,
+    "BAY": 127,
+    "BRA": 17,
+    "BRE": 460,
+    "BRO": 1230,
+    "CAL": 9,
+    "CHA": 160,
+    "CIT": 125,
+    "CLA": 160,
+    "CLL": 280,
+    "CLM": 45,
+    "DAD": 1550,
+    "DES": 19,
+    "DIX": 11,
+    "DUV": 700,
+    "ESC": 230,
+    "FLA": 95,
+    "FRA": 8,
+    "GAD": 30,
+    "GIL": 13,
+    "GLA": 7,
+    "GUL": 11,
+    "HAM": 8,
+    "HAR": 12,
+    "HEN": 20,
+    "HER": 155,
+    "HIG": 70,
+    "HIL": 1000,
+    "HOL": 12,
+    "IND": 130,
+    "JAC": 29,
+    "JEF": 10,
+    "LAF": 5,
+    "LAK": 300,
+    "LEE": 550,
+    "LEO": 220,
+    "LEV": 30,
+    "LIB": 5,
+    "MAD": 12,
+    "MAN": 310,
+    "MON": 55,
+    "MRN": 270,
+    "MRT": 120,
+    "NAS": 75,
+    "OKA": 145,
+    "OKE": 22,
+    "ORA": 900,
+    "OSC": 260,
+    "PAL": 1000,
+    "PAS": 420,
+    "PIN": 690,
+    "POL": 460,
+    "PUT": 50,
+    "SAN": 140,
+    "SAR": 350,
+    "SEM": 330,
+    "STJ": 230,
+    "STL": 250,
+    "SUM": 110,
+    "SUW": 28,
+    "TAY": 13,
+    "UNI": 8,
+    "VOL": 420,
+    "WAK": 25,
+    "WAL": 60,
+    "WAS": 17,
+}
+RACE_WEIGHTS = {
+    "1": 1,
+    "2": 2,
+    "3": 13,
+    "4": 18,
+    "5": 60,
+    "6": 2,
+    "7": 1,
+    "9": 3,
+}
+PARTY_WEIGHTS = {"REP": 40, "DEM": 33, "NPA": 24, "LPF": 1}
+MINOR_PARTY_WEIGHT = 2  # shared by every other code in _PARTY
+LAST_NAMES = [
+    "SMITH",
+    "JOHNSON",
+    "WILLIAMS",
+    "BROWN",
+    "JONES",
+    "GARCIA",
+    "MILLER",
+    "DAVIS",
+    "RODRIGUEZ",
+    "MARTINEZ",
+    "HERNANDEZ",
+    "LOPEZ",
+    "GONZALEZ",
+    "WILSON",
+    "ANDERSON",
+    "THOMAS",
+    "TAYLOR",
+    "MOORE",
+    "JACKSON",
+    "MARTIN",
+    "LEE",
+    "PEREZ",
+    "THOMPSON",
+    "WHITE",
+    "HARRIS",
+    "SANCHEZ",
+    "CLARK",
+    "RAMIREZ",
+    "LEWIS",
+    "ROBINSON",
+    "WALKER",
+    "YOUNG",
+    "ALLEN",
+    "KING",
+    "WRIGHT",
+    "SCOTT",
+    "TORRES",
+    "NGUYEN",
+    "HILL",
+    "FLORES",
+    "GREEN",
+    "ADAMS",
+    "NELSON",
+    "BAKER",
+    "HALL",
+    "RIVERA",
+    "CAMPBELL",
+    "MITCHELL",
+    "CARTER",
+    "ROBERTS",
+    "DE LA CRUZ",
+    "O'BRIEN",
+    "ST. JOHN",
+]
+FIRST_NAMES = [
+    "JAMES",
+    "MARY",
+    "ROBERT",
+    "PATRICIA",
+    "JOHN",
+    "JENNIFER",
+    "MICHAEL",
+    "LINDA",
+    "DAVID",
+    "ELIZABETH",
+    "WILLIAM",
+    "BARBARA",
+    "RICHARD",
+    "SUSAN",
+    "JOSEPH",
+    "JESSICA",
+    "THOMAS",
+    "SARAH",
+    "CARLOS",
+    "MARIA",
+    "JOSE",
+    "ANA",
+    "LUIS",
+    "CARMEN",
+    "DANIEL",
+    "NANCY",
+    "MATTHEW",
+    "LISA",
+    "ANTHONY",
+    "BETTY",
+    "MARK",
+    "SANDRA",
+    "KEVIN",
+    "ASHLEY",
+    "BRIAN",
+    "DOROTHY",
+    "JUAN",
+    "ROSA",
+    "WEI",
+    "MEI",
+]
+SUFFIXES = ["JR", "SR", "II", "III", "IV"]
+STREETS = [
+    "MAIN ST",
+    "OAK AVE",
+    "PALM DR",
+    "BAY SHORE BLVD",
+    "1ST ST N",
+    "US HIGHWAY 19",
+    "CYPRESS LN",
+    "ORANGE BLOSSOM TRL",
+    "GULF BLVD",
+    "MLK JR BLVD",
+]
+CITIES = {
+    "DAD": ["MIAMI", "HIALEAH", "MIAMI GARDENS", "HOMESTEAD"],
+    "BRO": ["FORT LAUDERDALE", "HOLLYWOOD", "PEMBROKE PINES"],
+    "HIL": ["TAMPA", "BRANDON", "PLANT CITY", "RIVERVIEW"],
+    "PIN": ["SAINT PETERSBURG", "CLEARWATER", "LARGO"],
+}
+
+
+def county_sizes(total, slugs):
+    """Split total rows across counties by their registered-voter weight."""
+    weight = sum(COUNTY_WEIGHTS[slug] for slug in slugs)
+    sizes = {
+        slug: max(1, total * COUNTY_WEIGHTS[slug] // weight) for slug in slugs
+    }
+    largest = max(slugs, key=lambda slug: COUNTY_WEIGHTS[slug])
+    sizes[largest] += total - sum(sizes.values())
+    return sizes
+
+
+def random_date(rng, first_year, last_year):
+    """Return a random MM/DD/YYYY date string."""
+    return "{:02d}/{:02d}/{}".format(
+        rng.randint(1, 12),
+        rng.randint(1, 28),
+        rng.randint(first_year, last_year),
+    )
+
+
+def voter_row(rng, slug, voter_id, races, parties):
+    """Build one raw VoterDetail row, with a little real-world mess."""
+    row = [""] * 38
+    row[0] = slug
+    row[1] = str(voter_id)
+    row[2] = rng.choice(LAST_NAMES)
+    row[3] = rng.choice(SUFFIXES) if rng.random() < 0.04 else ""
+    row[4] = rng.choice(FIRST_NAMES)
+    row[5] = rng.choice(FIRST_NAMES) if rng.random() < 0.7 else ""
+    row[6] = "Y" if rng.random() < 0.02 else "N"
+    if row[6] == "N":
+        street = rng.choice(STREETS)
+        if rng.random() < 0.05:
+            street = street.replace(" ", "  ")  # interior spaces to clean up
+        row[7] = "{} {}".format(rng.randint(1, 29999), street)
+        row[8] = (
+            "APT {}".format(rng.randint(1, 400)) if rng.random() < 0.2 else ""
+        )
+        row[9] = rng.choice(CITIES.get(slug, [lcv.FL_COUNTIES[slug].upper()]))
+        row[10] = "FL"
+        row[11] = str(rng.randint(32003, 34997))
+    row[19] = rng.choice("FFFFMMMMU")
+    row[20] = rng.choices(races[0], cum_weights=races[1])[0]
+    row[21] = random_date(rng, 1920, 2006)
+    row[22] = random_date(rng, 1960, lcv.YEAR)
+    row[23] = rng.choices(parties[0], cum_weights=parties[1])[0]
+    row[24] = str(rng.randint(1, 500))
+    row[28] = "INA" if rng.random() < 0.1 else "ACT"
+    row[29] = str(rng.randint(1, 28))
+    row[30] = str(rng.randint(1, 120))
+    row[31] = str(rng.randint(1, 40))
+    row[32] = str(rng.randint(1, 5))
+    row[33] = str(rng.randint(1, 5))
+    if row[6] == "N" and rng.random() < 0.6:
+        row[34] = rng.choice(["305", "727", "813", "904", "941", "954"])
+        row[35] = str(rng.randint(2000000, 9999999))
+    if rng.random() < 0.3:
+        row[37] = "{}.{}@EXAMPLE.COM".format(row[4], row[2]).replace(" ", "")
+    if rng.random() < 0.01:
+        row[2] += " "  # stray trailing space
+    return row
+
+
+def generate_voter_disk(total, slugs=None, seed=0):
+    """Write synthetic raw county files adding up to about total rows."""
+    if not slugs:
+        slugs = sorted(COUNTY_WEIGHTS)
+    rng = random.Random(seed)
+    party_weights = dict(PARTY_WEIGHTS)
+    minor_parties = [code for code in lcv._PARTY if code not in party_weights]
+    for code in minor_parties:
+        party_weights[code] = MINOR_PARTY_WEIGHT / len(minor_parties)
+    # (codes, cumulative weights) pairs for rng.choices()
+    races = (list(RACE_WEIGHTS), list(accumulate(RACE_WEIGHTS.values())))
+    parties = (list(party_weights), list(accumulate(party_weights.values())))
+    if not os.path.isdir(lcv.RAWBASE):
+        lcv.prep_directories(keep_loads=True)
+    date_string = lcv.VOTER_DATA_DATE.strftime("%Y%m%d")
+    voter_id = 100000000
+    for slug, size in county_sizes(total, slugs).items():
+        path = f"{lcv.RAWBASE}/{slug}_{date_string}.txt"
+        with open(path, "w") as raw_file:
+            for _ in range(size):
+                voter_id += 1
+                row = voter_row(rng, slug, voter_id, races, parties)
+                raw_file.write("\t".join(row) + "\n")
+        print(f"Wrote {size} rows to {path}")
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if len(args) == 1 and args[0].isdigit():
+        counties = lcv.get_option("counties")
+        generate_voter_disk(
+            int(args[0]),
+            slugs=counties.split(",") if counties else None,
+            seed=int(lcv.get_option("seed", "0")),
+        )
+    else:
+        print(
+            "Please provide a total row count, optionally with "
+            "--counties=HIL,PIN and --seed=N"
+        )
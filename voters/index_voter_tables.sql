@@ -1,9 +1,10 @@
 BEGIN;
-CREATE INDEX "voters_voter_fname" ON "voters_voter" ("fname");
-CREATE INDEX "voters_voter_lname" ON "voters_voter" ("lname");
-CREATE INDEX "voters_voter_birthdate" ON "voters_voter" ("birthdate");
-CREATE INDEX "voters_voter_county_slug" ON "voters_voter" ("county_slug");
-CREATE INDEX "voters_voter_addr1" ON "voters_voter" ("addr1");
-CREATE INDEX "voters_voter_voter_id" ON "voters_voter" ("voter_id");
-CREATE INDEX "voters_voter_active" ON "voters_voter" ("active");
+CREATE INDEX IF NOT EXISTS "voters_voter_fname" ON "voters_voter" ("fname");
+CREATE INDEX IF NOT EXISTS "voters_voter_lname_fname" ON "voters_voter" ("lname", "fname");
+CREATE INDEX IF NOT EXISTS "voters_voter_birthdate" ON "voters_voter" ("birthdate");
+CREATE INDEX IF NOT EXISTS "voters_voter_county_slug" ON "voters_voter" ("county_slug");
+CREATE INDEX IF NOT EXISTS "voters_voter_addr1" ON "voters_voter" ("addr1");
+CREATE INDEX IF NOT EXISTS "voters_voter_voter_id" ON "voters_voter" ("voter_id");
+CREATE INDEX IF NOT EXISTS "voters_voter_active" ON "voters_voter" ("active");
+CREATE INDEX IF NOT EXISTS "voters_voter_search_name" ON "voters_voter" USING gin ("search_name" gin_trgm_ops);
 COMMIT;
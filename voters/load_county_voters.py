@@ -1,17 +1,54 @@
 #!/usr/bin/env python
 import csv
 import datetime
+import functools
 import glob
+import hashlib
+import heapq
+import io
+import itertools
 import json
 import os
 import os.path
 import subprocess
 import sys
+import time
+import zlib
+from concurrent.futures import (
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+)
 
-import requests
+import psycopg2
+import psycopg2.errors
 from dateutil import parser
 from django.utils.text import slugify
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pipeline import (  # noqa: E402
+    ArrowCopySink,
+    ArrowCSVSink,
+    ArrowParquetSink,
+    CSVSink,
+    PandaSink,
+    ParquetSink,
+    PostgresCopySink,
+    RepairedText,
+    batch_rows,
+    delete_with_retries,
+    import_pyarrow,
+    parquet_batches,
+    parquet_rows,
+    put_with_retries,
+    rebatch,
+    run_pipeline,
+    run_sql_file,
+)
+from pipeline.columnar import PARQUET_BATCH_ROWS  # noqa: E402
+from pipeline.panda import PANDA_IN_FLIGHT  # noqa: E402
+from voters.names import normalize_name  # noqa: E402
+
 # GET VOTER_DATA_DATE – should be set to the date on the voter disk
 VOTER_DATA_DATE_STRING = os.getenv("VOTER_DATA_DATE")
 if not VOTER_DATA_DATE_STRING:
@@ -24,18 +61,14 @@ VOTER_DATA_DATE = parser.parse(VOTER_DATA_DATE_STRING).date()
 YEAR = VOTER_DATA_DATE.year
 SCRIPT_NAME = os.path.basename(__file__).split(".")[0]
 
-# PANDA VARS
-PANDA_AUTH_PARAMS = {
-    "email": os.getenv("PANDA_USER"),
-    "api_key": os.getenv("PANDA_API_KEY"),
-}
+# PANDA VARS (credentials, batching and retries are set in pipeline.panda)
 PANDA_BASE = os.getenv("PANDA_BASE")
 QUERY_LIMIT = 1200
-PANDA_BULK_UPDATE_SIZE = 1000
 PANDA_API = "{}/api/1.0".format(PANDA_BASE)
 PANDA_ALL_DATA_URL = "{}/data/".format(PANDA_API)
 PANDA_DATASET_BASE = "{}/dataset".format(PANDA_API)
 PANDA_VOTERS_SUFFIX = "&category=voters"
+PANDA_COUNTY_WORKERS = os.getenv("PANDA_COUNTY_WORKERS", "1")
 
 # FILE SYSTEM VARS
 BASE = os.getenv("PANDA_LOADERS_BASE_DIR", "/tmp")
@@ -45,14 +78,29 @@ TEMP = f"{YEARBASE}/temp"
 PREPBASE = f"{YEARBASE}/prep"
 LOADBASE = f"{YEARBASE}/load"
 LOADED = f"{YEARBASE}/loaded"
-WORKING_DIRS = [RAWBASE, LOADBASE, LOADED, PREPBASE, TEMP]
-PROCESSING_DIRS = WORKING_DIRS[1:]
+HISTBASE = f"{YEARBASE}/VoterHistory"
+PROCESSING_DIRS = [LOADBASE, LOADED, PREPBASE, TEMP]
+WORKING_DIRS = [RAWBASE, HISTBASE] + PROCESSING_DIRS
+# Emptied by purge_directories(), which keeps LOADED's PANDA export state;
+# load_history() clears HISTBASE itself once it has loaded the files
+PURGE_DIRS = [RAWBASE, LOADBASE, PREPBASE, TEMP]
+PREP_MANIFEST = f"{YEARBASE}/prep_manifest.json"
+DUPLICATES_CSV = f"{YEARBASE}/duplicates.csv"
 
 
 def get_postgres_db_name():
     return f"voter_data_{VOTER_DATA_DATE_STRING.replace('-', '')}"
 
 
+def get_option(name, default=None):
+    """Return the value of a --name=value command-line flag, if passed."""
+    prefix = f"--{name}="
+    for arg in sys.argv[1:]:
+        if arg.startswith(prefix):
+            return arg[len(prefix):]
+    return default
+
+
 def empty_directory(path):
     for i in glob.glob(os.path.join(path, '*')):
         os.remove(i)
@@ -60,47 +108,34 @@ def empty_directory(path):
 
 def purge_directories(dirs=None):
     if not dirs:
-        dirs = WORKING_DIRS
+        dirs = PURGE_DIRS
     for directory in dirs:
         if len(os.listdir(directory)) > 0:
             empty_directory(directory)
 
 
-def prep_directories():
-    """Make sure working directories exist and processing dirs are empty."""
-    for each in [YEARBASE] + WORKING_DIRS:
-        if not os.path.isdir(each):
-            os.mkdir(each)
-    purge_directories(dirs=PROCESSING_DIRS)
+def purge_county_files(slugs):
+    """Remove just the named counties' files from the PURGE_DIRS."""
+    for directory in PURGE_DIRS:
+        for each in os.listdir(directory):
+            if each[:3] in slugs:
+                os.remove(os.path.join(directory, each))
 
 
-def panda_get(url, params):
-    """GET call to Panda API."""
-    if not params:
-        params = PANDA_AUTH_PARAMS
-    else:
-        params.update(PANDA_AUTH_PARAMS)
-    return requests.get(url, params=params)
-
-
-def panda_put(url, data, params):
-    """PUT call to Panda API."""
-    if not params:
-        params = PANDA_AUTH_PARAMS
-    else:
-        params.update(PANDA_AUTH_PARAMS)
-    return requests.put(
-        url, data, params=params, headers={"Content-Type": "application/json"}
-    )
-
+def prep_directories(keep_loads=False):
+    """
+    Make sure working directories exist and processing dirs are empty.
 
-def panda_delete(url, params):
-    """DELETE call to Panda API."""
-    if not params:
-        params = PANDA_AUTH_PARAMS
+    With keep_loads, prepped files in LOADBASE are left in place
+    for an incremental prep. PANDA export state in LOADED is always kept.
+    """
+    for each in [YEARBASE] + WORKING_DIRS:
+        if not os.path.isdir(each):
+            os.mkdir(each)
+    if keep_loads:
+        purge_directories(dirs=[PREPBASE, TEMP])
     else:
-        params.update(PANDA_AUTH_PARAMS)
-    return requests.delete(url, params=params)
+        purge_directories(dirs=[LOADBASE, PREPBASE, TEMP])
 
 
 HISTORY_CODES = {
@@ -137,6 +172,23 @@ VOTER_COLUMNS = [
     "registration_date",
     "active",  # bool
 ]
+# Column order of prepped rows in LOADBASE CSVs (see clean_row)
+LOAD_COLUMNS = VOTER_COLUMNS[:15] + VOTER_COLUMNS[16:] + [VOTER_COLUMNS[15]]
+# Positions of VOTER_COLUMNS and the voter ID in prepped rows
+VOTER_ORDER = [LOAD_COLUMNS.index(column) for column in VOTER_COLUMNS]
+VOTER_ID_INDEX = LOAD_COLUMNS.index("voter_ID")
+BIRTHDATE_INDEX = LOAD_COLUMNS.index("birthdate")
+# Low-cardinality columns, dictionary-encoded in Parquet load files
+DICTIONARY_COLUMNS = [
+    "city",
+    "zipcode",
+    "gender",
+    "race",
+    "party",
+    "areacode",
+    "exemption_requested",
+    "active",
+]
 
 _RACE = {
     "1": "American Indian or Alaskan Native",
@@ -322,9 +374,44 @@ We want to harvest these columns for the database
 23: Registration Date
 29: voter status (ACT or INA – for active and inactive) 
 
-We use the COLUMNS value to slice the CSV, using csvkit
+We use the COLUMNS value to slice the CSV, either with csvkit
+(the staged path) or in-process by index (the streaming path)
 """
 COLUMNS = "3,5,6,4,8,9,10,12,20,21,22,24,35,36,38,2,7,23,29"
+COLUMN_INDEXES = [int(col) - 1 for col in COLUMNS.split(",")]
+HEADER_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "HEADER.txt"
+)
+# Set PREP_STREAMING=0 to fall back to the cp/cat/csvcut staging chain
+PREP_STREAMING = os.getenv("PREP_STREAMING", "1") != "0"
+# Rows held in memory at once while sorting; larger counties spill to TEMP
+PREP_SORT_CHUNK_ROWS = int(os.getenv("PREP_SORT_CHUNK_ROWS", "200000"))
+# "python" (row by row) or "arrow" (column by column; needs pyarrow)
+PREP_BACKEND = os.getenv("PREP_BACKEND", "python")
+# Load file format: "csv" or "parquet" (compressed columnar; needs pyarrow)
+PREP_FORMAT = os.getenv("PREP_FORMAT", "csv")
+PREP_FORMATS = ["csv", "parquet"]
+# Recorded in the prep manifest; bump when prep output changes
+PREP_CODE_VERSION = 2
+# Set PREP_DEDUP=0 to skip looking for cross-county duplicates
+PREP_DEDUP = os.getenv("PREP_DEDUP", "1") != "0"
+# find_duplicates() holds one bucket, about 1/256th of the voters, at once
+DEDUP_BUCKETS = 256
+DUPLICATE_HEADINGS = [
+    "duplicate_group",
+    "blocking_key",
+    "county_slug",
+    "voter_id",
+    "lname",
+    "fname",
+]
+
+
+def get_prep_header():
+    """Return the raw header names for our COLUMNS, in COLUMNS order."""
+    with open(HEADER_FILE, "r") as header_file:
+        raw_header = header_file.readline().rstrip("\n").split("\t")
+    return [raw_header[index] for index in COLUMN_INDEXES]
 
 
 def stage_local_files(filename, slug):
@@ -339,63 +426,612 @@ def stage_local_files(filename, slug):
     return prepfile
 
 
-def prep(filename):
+def clean_row(row):
     """
-    Prepare a raw voter .txt file.
+    Clean one row of COLUMNS values and translate its codes.
 
-    - Add a raw header
-    - Remove unwanted columns
-    - Remove unwanted columns with csvcut
-    - Process the rows, fixing race and party values
-    - Replace column names with our preferred headings for Panda
-    - Sort the results by last name
-    - Output a final CSV ready for loading into Panda
+    The row's values arrive in COLUMNS order, and the cleaned row
+    is returned in the column order expected by voters_voter.
     """
-    prepstart = datetime.datetime.now()
-    slug = filename[:3]
-    loadfile = "{}/{}.csv".format(LOADBASE, slug)
+    (
+        lname,
+        fname,
+        mname,
+        suffix,
+        addr1,
+        addr2,
+        city,
+        zipcode,
+        gender,
+        race,
+        birthdate,
+        party,
+        areacode,
+        phone,
+        email,
+        voter_id,
+        suppress,
+        registered,
+        status,
+    ) = row
+    return [
+        lname.strip(),
+        fname.strip(),
+        mname.strip(),
+        suffix.strip(),
+        " ".join(addr1.split()),  # clean interior white spaces
+        addr2.strip(),
+        city.strip(),
+        zipcode.strip(),
+        gender.strip(),
+        _RACE.get(race, ""),
+        birthdate.strip(),
+        _PARTY.get(party, "OTHER"),
+        areacode.strip(),
+        phone.strip(),
+        email.strip(),
+        SUPPRESS_MAP.get(suppress, "false"),
+        registered,
+        ACTIVE_MAP.get(status, "true"),
+        voter_id.strip(),
+    ]
+
+
+def stream_raw_rows(filename):
+    """
+    Yield cleaned rows straight from a raw tab-delimited county file.
+
+    The raw file is read once, with no temp or prep copies, decoded
+    in its sniffed encoding, with any badly encoded lines repaired.
+    The COLUMNS values are picked out by index.
+    """
+    width = max(COLUMN_INDEXES) + 1
+    raw_text = RepairedText(f"{RAWBASE}/{filename}")
+    for row in csv.reader(raw_text, delimiter="\t"):
+        if not row:
+            continue
+        if len(row) < width:
+            row += [""] * (width - len(row))
+        yield clean_row([row[index] for index in COLUMN_INDEXES])
+    report_repairs(filename, raw_text)
+
+
+def report_repairs(filename, raw_text):
+    """Say how many lines of a raw file needed their encoding repaired."""
+    if raw_text.repaired:
+        print(
+            f"{filename}: repaired the encoding of {raw_text.repaired} "
+            f"lines ({raw_text.encoding} file)"
+        )
+
+
+def stream_staged_rows(filename, slug):
+    """Yield cleaned rows from a file staged with stage_local_files()."""
     prepfile = stage_local_files(filename, slug)
     with open(prepfile, "r") as prepped_file:
-        biglist = []  # a list of row lists
-        reader = csv.DictReader(prepped_file)
-        header = reader.fieldnames
+        reader = csv.reader(prepped_file)
+        next(reader, None)  # skip the header
         for row in reader:
-            race = _RACE.get(row.get("race"), "")
-            party = _PARTY.get(row.get("party"), "OTHER")
-            suppress = SUPPRESS_MAP.get(row.get("suppress"), "false")
-            registered = row.get("RegDate", "")
-            active = ACTIVE_MAP.get(row.get("VoterStatus"), "true")
-            biglist.append(
-                [
-                    row["lname"].strip(),
-                    row["fname"].strip(),
-                    row["mname"].strip(),
-                    row["suffix"].strip(),
-                    " ".join(
-                        row["addr1"].split()
-                    ),  # clean interior white spaces
-                    row["addr2"].strip(),
-                    row["city"].strip(),
-                    row["zip"].strip(),
-                    row["gender"].strip(),
-                    race,
-                    row["birthdate"].strip(),
-                    party,
-                    row["areacode"].strip(),
-                    row["phone"].strip(),
-                    row["email"].strip(),
-                    suppress,
-                    registered,
-                    active,
-                    row["voter_ID"].strip(),
-                ]
-            )
-        biglist = sorted(biglist)  # sorts list of row lists by last name
-        with open(loadfile, "w") as load_file:
-            writer = csv.writer(load_file)
-            writer.writerow(header)
-            for entry in biglist:
-                writer.writerow(entry)
+            if row:
+                yield clean_row(row)
+
+
+# Whitespace as str.split() and str.strip() see it, for the arrow backend
+WHITESPACE = "".join(filter(str.isspace, map(chr, range(0x3001))))
+# Joins the fields of an arrow backend sort key; see sort_keys()
+KEY_SEPARATOR = "\x00\x01"
+# Rows per batch in the arrow backend's spilled sort runs
+ARROW_RUN_BATCH_ROWS = 8192
+BLANK_LINES = {"\n", "\r\n", "\r"}
+
+
+def read_line_block(raw_file, size):
+    """Read raw lines until size non-blank lines are in hand, or EOF."""
+    lines = []
+    count = 0
+    while count < size:
+        more = list(itertools.islice(raw_file, size - count))
+        if not more:
+            break
+        lines += more
+        count += sum(1 for line in more if line not in BLANK_LINES)
+    return lines
+
+
+def read_arrow_block(pa, block, width):
+    """
+    Parse a block of raw tab-delimited lines into COLUMNS string arrays.
+
+    Returns None unless every line has width fields, enough to hold
+    COLUMNS; csv.reader would pad or cut the others instead.
+    """
+    if width <= max(COLUMN_INDEXES):
+        return None
+    names = [str(index) for index in range(width)]
+    try:
+        table = pa.csv.read_csv(
+            io.BytesIO(block.encode("utf-8")),
+            read_options=pa.csv.ReadOptions(column_names=names),
+            parse_options=pa.csv.ParseOptions(
+                delimiter="\t", quote_char=False
+            ),
+            convert_options=pa.csv.ConvertOptions(
+                column_types={name: pa.string() for name in names},
+                include_columns=[names[index] for index in COLUMN_INDEXES],
+            ),
+        )
+    except pa.ArrowInvalid:
+        return None
+    return [column.combine_chunks() for column in table.columns]
+
+
+def code_labels(pa, column, mapping, default):
+    """Translate a column of codes to labels, as mapping.get() would."""
+    indexes = pa.compute.index_in(
+        column, value_set=pa.array(list(mapping), pa.string())
+    )
+    labels = pa.array(list(mapping.values()), pa.string()).take(indexes)
+    return pa.compute.fill_null(labels, default)
+
+
+def clean_columns(pa, columns):
+    """
+    Clean a block of COLUMNS string arrays as clean_row() cleans rows.
+
+    The arrays arrive in COLUMNS order, and the cleaned columns are
+    returned as a record batch in the column order of LOAD_COLUMNS.
+    """
+    pc = pa.compute
+    (
+        lname,
+        fname,
+        mname,
+        suffix,
+        addr1,
+        addr2,
+        city,
+        zipcode,
+        gender,
+        race,
+        birthdate,
+        party,
+        areacode,
+        phone,
+        email,
+        voter_id,
+        suppress,
+        registered,
+        status,
+    ) = columns
+
+    def strip(column):
+        return pc.utf8_trim(column, characters=WHITESPACE)
+
+    # clean interior white spaces
+    addr1 = pc.replace_substring_regex(
+        addr1, pattern=f"[{WHITESPACE}]+", replacement=" "
+    )
+    return pa.RecordBatch.from_arrays(
+        [
+            strip(lname),
+            strip(fname),
+            strip(mname),
+            strip(suffix),
+            pc.utf8_trim(addr1, characters=" "),
+            strip(addr2),
+            strip(city),
+            strip(zipcode),
+            strip(gender),
+            code_labels(pa, race, _RACE, ""),
+            strip(birthdate),
+            code_labels(pa, party, _PARTY, "OTHER"),
+            strip(areacode),
+            strip(phone),
+            strip(email),
+            code_labels(pa, suppress, SUPPRESS_MAP, "false"),
+            registered,
+            code_labels(pa, status, ACTIVE_MAP, "true"),
+            strip(voter_id),
+        ],
+        names=LOAD_COLUMNS,
+    )
+
+
+def rows_batch(pa, rows):
+    """Turn a list of cleaned rows into a record batch of LOAD_COLUMNS."""
+    return pa.RecordBatch.from_arrays(
+        [
+            pa.array([row[index] for row in rows], pa.string())
+            for index in range(len(LOAD_COLUMNS))
+        ],
+        names=LOAD_COLUMNS,
+    )
+
+
+def keyed_batch(pa, batch, escape=False):
+    """
+    Add a sort_key column that orders rows as sorted() orders row lists.
+
+    The fields are joined with KEY_SEPARATOR, which sorts below anything
+    a longer field could go on with. Fields Arrow parsed can't hold
+    NULs; with escape, any NULs become "\\x00\\x02" first, so that
+    stays true.
+    """
+    columns = batch.columns
+    if escape:
+        columns = [
+            pa.compute.replace_substring(column, "\x00", "\x00\x02")
+            for column in columns
+        ]
+    keys = pa.compute.binary_join_element_wise(*columns, KEY_SEPARATOR)
+    return pa.RecordBatch.from_arrays(
+        batch.columns + [keys], names=LOAD_COLUMNS + ["sort_key"]
+    )
+
+
+def arrow_sorted_chunks(pa, filename, chunk_size):
+    """
+    Yield sorted chunks of cleaned rows as Arrow record batches.
+
+    Each block of raw lines is parsed by pyarrow's CSV reader, cleaned a
+    column at a time with clean_columns() and sorted on its sort_key,
+    with no Python rows built. If a block holds anything the plain tab
+    split can't match csv.reader on (quote characters, NULs, bare
+    carriage returns or ragged rows), the rest of the file is read with
+    csv.reader and cleaned and sorted row by row, still in chunks.
+    """
+    raw_text = RepairedText(f"{RAWBASE}/{filename}")
+    raw_file = iter(raw_text)
+    try:
+        while True:
+            lines = read_line_block(raw_file, chunk_size)
+            records = [line for line in lines if line not in BLANK_LINES]
+            if not records:
+                return
+            block = "".join(lines)
+            columns = None
+            if (
+                '"' not in block
+                and "\x00" not in block
+                and block.count("\r") == block.count("\r\n")
+            ):
+                width = records[0].count("\t") + 1
+                columns = read_arrow_block(pa, block, width)
+            if columns is None:
+                rows = csv.reader(
+                    itertools.chain(lines, raw_file), delimiter="\t"
+                )
+                chunks = sort_chunks(
+                    (
+                        clean_row(
+                            [
+                                row[index] if index < len(row) else ""
+                                for index in COLUMN_INDEXES
+                            ]
+                        )
+                        for row in rows
+                        if row
+                    ),
+                    chunk_size,
+                )
+                for chunk in chunks:
+                    yield keyed_batch(pa, rows_batch(pa, chunk), escape=True)
+                return
+            batch = keyed_batch(pa, clean_columns(pa, columns))
+            yield batch.take(pa.compute.sort_indices(batch["sort_key"]))
+            if len(records) < chunk_size:
+                return
+    finally:
+        raw_file.close()
+        report_repairs(filename, raw_text)
+
+
+def sort_chunks(rows, chunk_size):
+    """Yield rows in sorted chunks of chunk_size rows."""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            chunk.sort()
+            yield chunk
+            chunk = []
+    chunk.sort()
+    yield chunk
+
+
+def read_sort_run(path):
+    """Yield the rows of one sorted run file, removing it when exhausted."""
+    with open(path, "r", newline="") as run_file:
+        yield from csv.reader(run_file)
+    os.remove(path)
+
+
+def merge_sorted_chunks(chunks, slug, chunk_size):
+    """
+    Yield the rows of sorted chunks in one sorted() order.
+
+    Full chunks are spilled to sorted runs in TEMP and heap-merged with the
+    short final chunk, so only one chunk is held in memory at a time.
+    """
+    run_paths = []
+    tail = []
+    for chunk in chunks:
+        if len(chunk) < chunk_size:  # a short chunk is always the last one
+            tail = chunk
+            break
+        run_path = f"{TEMP}/{slug}_run_{len(run_paths)}.csv"
+        with open(run_path, "w", newline="") as run_file:
+            csv.writer(run_file).writerows(chunk)
+        run_paths.append(run_path)
+    if not run_paths:  # small county: everything fit in one chunk
+        yield from tail
+        return
+    yield from heapq.merge(tail, *[read_sort_run(p) for p in run_paths])
+
+
+def read_arrow_run(pa, path):
+    """Yield the batches of one Arrow sort run, removing it when exhausted."""
+    with pa.OSFile(path) as run_file:
+        reader = pa.ipc.open_file(run_file)
+        for index in range(reader.num_record_batches):
+            yield reader.get_batch(index)
+    os.remove(path)
+
+
+def next_rows(run):
+    """Return the next batch of a run that has any rows, or None."""
+    return next((batch for batch in run if batch.num_rows), None)
+
+
+def merge_sorted_batches(pa, chunks, slug, chunk_size):
+    """
+    Yield the rows of sorted chunk batches in one sort_key order.
+
+    As in merge_sorted_chunks(), full chunks are spilled to sorted runs
+    in TEMP, here Arrow IPC files, and merged with the short final chunk.
+    Runs are read back ARROW_RUN_BATCH_ROWS rows at a time. Each step
+    takes every buffered row up to the smallest last key buffered, which
+    no unread row can sort below, and sorts just those rows.
+    """
+    pc = pa.compute
+    run_paths = []
+    tail = None
+    for chunk in chunks:
+        if chunk.num_rows < chunk_size:  # a short chunk is always the last
+            tail = chunk
+            break
+        run_path = f"{TEMP}/{slug}_run_{len(run_paths)}.arrow"
+        with pa.OSFile(run_path, "wb") as run_file:
+            with pa.ipc.new_file(run_file, chunk.schema) as writer:
+                writer.write_table(
+                    pa.Table.from_batches([chunk]),
+                    max_chunksize=ARROW_RUN_BATCH_ROWS,
+                )
+        run_paths.append(run_path)
+    if not run_paths:  # small county: everything fit in one chunk
+        if tail is not None:
+            yield tail
+        return
+    runs = [read_arrow_run(pa, path) for path in run_paths]
+    if tail is not None:
+        runs.append(iter([tail]))
+    buffered = [(run, next_rows(run)) for run in runs]
+    buffered = [(run, batch) for run, batch in buffered if batch is not None]
+    while buffered:
+        frontier = min(batch["sort_key"][-1].as_py() for _, batch in buffered)
+        pieces = []
+        still_buffered = []
+        for run, batch in buffered:
+            count = pc.sum(pc.less_equal(batch["sort_key"], frontier))
+            count = count.as_py() or 0
+            pieces.append(batch.slice(0, count))
+            if count < batch.num_rows:
+                still_buffered.append((run, batch.slice(count)))
+            else:
+                batch = next_rows(run)
+                if batch is not None:
+                    still_buffered.append((run, batch))
+        buffered = still_buffered
+        step = pa.Table.from_batches(pieces)
+        order = pc.sort_indices(step, sort_keys=[("sort_key", "ascending")])
+        yield from step.take(order).to_batches()
+
+
+def external_sort(rows, slug, chunk_size=None):
+    """
+    Yield rows in sorted() order while holding at most chunk_size in memory.
+
+    Rows are sorted in fixed-size chunks; if there's more than one chunk,
+    each is spilled to a sorted run in TEMP and the runs are heap-merged.
+    """
+    if not chunk_size:
+        chunk_size = PREP_SORT_CHUNK_ROWS
+    chunks = sort_chunks(rows, chunk_size)
+    return merge_sorted_chunks(chunks, slug, chunk_size)
+
+
+def prepped_rows(filename, streaming=None, backend=None, sort=True):
+    """
+    Yield the cleaned rows of a raw county file, sorted unless sort=False.
+
+    PREP_STREAMING and PREP_BACKEND pick how the raw file is read
+    and cleaned, unless streaming or backend is passed.
+    """
+    if streaming is None:
+        streaming = PREP_STREAMING
+    if backend is None:
+        backend = PREP_BACKEND
+    slug = filename[:3]
+    chunk_size = PREP_SORT_CHUNK_ROWS
+    if backend == "arrow":
+        batches = prepped_batches(filename, sort=sort)
+        return itertools.chain.from_iterable(map(batch_rows, batches))
+    if streaming:
+        rows = stream_raw_rows(filename)
+    else:
+        rows = stream_staged_rows(filename, slug)
+    if not sort:
+        return rows
+    return external_sort(rows, slug, chunk_size)
+
+
+def prepped_batches(filename, sort=True):
+    """
+    Yield the cleaned rows of a raw county file as Arrow record batches.
+
+    This is prepped_rows() for PREP_BACKEND=arrow: batches of
+    PARQUET_BATCH_ROWS rows in LOAD_COLUMNS, sorted unless sort=False.
+    """
+    pa = import_pyarrow()[0]
+    chunk_size = PREP_SORT_CHUNK_ROWS
+    batches = arrow_sorted_chunks(pa, filename, chunk_size)
+    if sort:
+        batches = merge_sorted_batches(pa, batches, filename[:3], chunk_size)
+    for batch in rebatch(batches, PARQUET_BATCH_ROWS):
+        # drop the sort_key column
+        yield pa.RecordBatch.from_arrays(
+            batch.columns[:-1], names=LOAD_COLUMNS
+        )
+
+
+def load_path(slug, prep_format=None):
+    """Return the path of a county's load file in LOADBASE."""
+    return f"{LOADBASE}/{slug}.{prep_format or PREP_FORMAT}"
+
+
+def load_file_rows(file_name):
+    """
+    Yield the prepped rows of a load file in LOADBASE, in LOAD_COLUMNS order.
+
+    CSV load files are parsed, skipping their header; Parquet ones are
+    read a record batch at a time.
+    """
+    path = f"{LOADBASE}/{file_name}"
+    if file_name.endswith(".parquet"):
+        yield from parquet_rows(path, columns=LOAD_COLUMNS)
+        return
+    with open(path, "r", newline="") as load_file:
+        reader = csv.reader(load_file)
+        # the header names raw columns, not LOAD_COLUMNS
+        next(reader, None)
+        yield from reader
+
+
+def blocking_key(row):
+    """
+    Return the key that groups a prepped row with its possible duplicates.
+
+    That's the voter's normalized last and first names and birthdate, or
+    None if the row lacks any of them.
+    """
+    if not (row[0] and row[1] and row[BIRTHDATE_INDEX]):
+        return None
+    return f"{normalize_name(row[0], row[1])}|{row[BIRTHDATE_INDEX]}"
+
+
+def duplicate_rows(bucket_paths):
+    """
+    Yield a row for each voter in a blocking key group that spans counties.
+
+    Each bucket file is grouped by key in memory on its own, then removed;
+    groups are numbered in the order they're found.
+    """
+    group = 0
+    for path in bucket_paths:
+        blocks = {}
+        with open(path, "r", newline="") as bucket:
+            for key, *voter in csv.reader(bucket):
+                blocks.setdefault(key, []).append(voter)
+        os.remove(path)
+        for key in sorted(blocks):
+            voters = blocks[key]
+            if len({voter[0] for voter in voters}) > 1:
+                group += 1
+                for voter in voters:
+                    yield [group, key] + voter
+
+
+def find_duplicates(load_files=None):
+    """
+    Find voters who may appear in more than one county's load file.
+
+    Candidates share a blocking_key(). One pass over the load files in
+    LOADBASE scatters each voter into one of DEDUP_BUCKETS files in TEMP
+    by the CRC-32 of its key, so every voter sharing a key lands in the
+    same bucket, and memory only ever has to hold one bucket. Groups
+    that span counties are written to DUPLICATES_CSV, a row per voter.
+    """
+    if load_files is None:
+        load_files = [
+            each
+            for each in sorted(no_dotfiles(LOADBASE))
+            if each[:3] in FL_COUNTIES
+        ]
+    start = datetime.datetime.now()
+    bucket_paths = [f"{TEMP}/dedup_{i:03}.csv" for i in range(DEDUP_BUCKETS)]
+    buckets = [CSVSink(path) for path in bucket_paths]
+    try:
+        for each in load_files:
+            slug = each[:3]
+            for row in load_file_rows(each):
+                key = blocking_key(row)
+                if key:
+                    buckets[zlib.crc32(key.encode()) % DEDUP_BUCKETS].add(
+                        [key, slug, row[VOTER_ID_INDEX], row[0], row[1]]
+                    )
+    finally:
+        for bucket in buckets:
+            bucket.close()
+    stats = run_pipeline(
+        duplicate_rows(bucket_paths),
+        CSVSink(DUPLICATES_CSV, header=DUPLICATE_HEADINGS),
+    )
+    print(
+        f"Found {stats.rows} possible cross-county duplicate voters "
+        f"in {datetime.datetime.now() - start}; see {DUPLICATES_CSV}"
+    )
+    return stats.rows
+
+
+def prep(filename, streaming=None, backend=None, prep_format=None):
+    """
+    Prepare a raw voter .txt file.
+
+    - Pick out the COLUMNS we want, either streaming the raw file
+      or staging it with a raw header and csvcut (PREP_STREAMING=0)
+    - Process the rows, fixing race and party values, row by row or,
+      with PREP_BACKEND=arrow, a column at a time in record batches
+    - Sort the results by last name, spilling to TEMP for big counties
+    - Output a final load file ready for loading into Panda: a CSV, or
+      with PREP_FORMAT=parquet, a compressed Parquet file whose
+      low-cardinality columns are dictionary-encoded
+    """
+    if prep_format is None:
+        prep_format = PREP_FORMAT
+    if backend is None:
+        backend = PREP_BACKEND
+    prepstart = datetime.datetime.now()
+    slug = filename[:3]
+    loadfile = load_path(slug, prep_format)
+    # rows come out sorted by last name
+    if backend == "arrow":
+        source = prepped_batches(filename)
+        if prep_format == "parquet":
+            sink = ArrowParquetSink(loadfile, LOAD_COLUMNS, DICTIONARY_COLUMNS)
+        else:
+            sink = ArrowCSVSink(loadfile, header=get_prep_header())
+    else:
+        source = prepped_rows(filename, streaming=streaming, backend=backend)
+        if prep_format == "parquet":
+            sink = ParquetSink(loadfile, LOAD_COLUMNS, DICTIONARY_COLUMNS)
+        else:
+            sink = CSVSink(loadfile, header=get_prep_header())
+    run_pipeline(source, sink)
+    # don't leave a stale load file for the county in the other format
+    for other_format in PREP_FORMATS:
+        stale = load_path(slug, other_format)
+        if other_format != prep_format and os.path.isfile(stale):
+            os.remove(stale)
     print(
         "{} ready for loading; prepping took {}".format(
             filename, (datetime.datetime.now() - prepstart)
@@ -403,6 +1039,78 @@ def prep(filename):
     )
 
 
+def get_prep_version():
+    """
+    Fingerprint the code and mappings that shape a prepped county file.
+
+    Bump PREP_CODE_VERSION when changing prep logic that isn't captured
+    by the column list or the code-to-label maps.
+    """
+    version_data = json.dumps(
+        [PREP_CODE_VERSION, COLUMNS, _RACE, _PARTY, SUPPRESS_MAP, ACTIVE_MAP],
+        sort_keys=True,
+    )
+    return hashlib.sha256(version_data.encode("utf-8")).hexdigest()[:16]
+
+
+def hash_file(path, blocksize=1 << 20):
+    """Return the sha256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(blocksize), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_manifest():
+    """Load the prep manifest, keyed by raw file name."""
+    if not os.path.isfile(PREP_MANIFEST):
+        return {}
+    with open(PREP_MANIFEST, "r") as f:
+        return json.load(f)
+
+
+def write_manifest(manifest):
+    """Save the prep manifest, replacing the old one atomically."""
+    temp_manifest = f"{PREP_MANIFEST}.tmp"
+    with open(temp_manifest, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temp_manifest, PREP_MANIFEST)
+
+
+def manifest_entry(filename, previous=None):
+    """
+    Describe a raw file and the prep version for the manifest.
+
+    The content hash is reused from a previous entry when size and mtime
+    haven't changed, so unchanged files aren't re-read.
+    """
+    path = f"{RAWBASE}/{filename}"
+    stat = os.stat(path)
+    entry = {"size": stat.st_size, "mtime": stat.st_mtime}
+    if (
+        previous
+        and previous.get("size") == entry["size"]
+        and previous.get("mtime") == entry["mtime"]
+    ):
+        entry["sha256"] = previous.get("sha256")
+    else:
+        entry["sha256"] = hash_file(path)
+    entry["prep_version"] = get_prep_version()
+    return entry
+
+
+def needs_prep(filename, entry, previous):
+    """Tell whether a raw file's inputs or transforms changed since prep."""
+    if not previous:
+        return True
+    if not os.path.isfile(load_path(filename[:3])):
+        return True
+    return any(
+        entry[key] != previous.get(key) for key in ("sha256", "prep_version")
+    )
+
+
 def no_dotfiles(path):
     """Eliminate dot-files from consideration."""
     for local_file in os.listdir(path):
@@ -410,52 +1118,1077 @@ def no_dotfiles(path):
             yield local_file
 
 
-def prep_files():
-    """Cycle through entries and prep them."""
-    prep_directories()  # make sure prep directories exist
+def report_prep_failures(failures):
+    """Print any per-county prep errors collected by prep_files()."""
+    if not failures:
+        return
+    print(f"{len(failures)} county files failed to prep:")
+    for filename, error in sorted(failures.items()):
+        print(f"• {filename}: {error!r}")
+
+
+def prep_files(workers=None, full=None):
+    """
+    Cycle through entries and prep them.
+
+    Preps are incremental: a manifest in YEARBASE records each raw file's
+    size, mtime, content hash and the prep version behind its load file,
+    and only counties whose inputs or transforms changed are prepped again.
+    Pass --full to purge LOADBASE and prep everything.
+
+    With more than one worker (--workers=N or PREP_WORKERS), counties are
+    prepped in a process pool, largest raw files first, so the big counties
+    don't end up as a long tail. A county that fails doesn't stop the run;
+    errors are reported at the end and returned, keyed by file name.
+    """
+    if workers is None:
+        workers = int(get_option("workers", os.getenv("PREP_WORKERS", "1")))
+    if full is None:
+        full = "--full" in sys.argv[1:]
+    prep_directories(keep_loads=not full)  # make sure prep dirs exist
     voter_files = sorted(no_dotfiles(RAWBASE))
     valid_files = [f for f in voter_files if f[:3] in FL_COUNTIES]
-    print(f"Prepping {len(valid_files)} county voter files")
-    for i, each in enumerate(valid_files):
-        slug = each[:3]
-        print(f"{i + 1}: Prepping voter data for {FL_COUNTIES.get(slug)}")
-        prep(each)
+    previous_manifest = {} if full else read_manifest()
+    manifest = {}
+    entries = {}
+    for each in valid_files:
+        previous = previous_manifest.get(each)
+        entries[each] = manifest_entry(each, previous)
+        if not needs_prep(each, entries[each], previous):
+            manifest[each] = entries[each]
+    live_slugs = {f[:3] for f in valid_files}
+    removed = False
+    for each in set(previous_manifest) - set(valid_files):
+        if each[:3] in live_slugs:
+            continue
+        for prep_format in PREP_FORMATS:
+            stale_load = load_path(each[:3], prep_format)
+            if os.path.isfile(stale_load):
+                os.remove(stale_load)
+                removed = True
+    write_manifest(manifest)
+    to_prep = [f for f in valid_files if f not in manifest]
+    print(
+        f"Prepping {len(to_prep)} county voter files "
+        f"({len(manifest)} unchanged)"
+    )
+    failures = {}
+    if workers > 1:
+        to_prep.sort(key=lambda f: entries[f]["size"], reverse=True)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            for each in to_prep:
+                futures[executor.submit(prep, each)] = each
+            for i, future in enumerate(as_completed(futures)):
+                each = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    failures[each] = e
+                else:
+                    manifest[each] = entries[each]
+                    write_manifest(manifest)
+                    county = FL_COUNTIES.get(each[:3])
+                    print(f"{i + 1}: Prepped voter data for {county}")
+    else:
+        for i, each in enumerate(to_prep):
+            slug = each[:3]
+            print(f"{i + 1}: Prepping voter data for {FL_COUNTIES.get(slug)}")
+            try:
+                prep(each)
+            except Exception as e:
+                failures[each] = e
+            else:
+                manifest[each] = entries[each]
+                write_manifest(manifest)
+    report_prep_failures(failures)
+    if PREP_DEDUP and (
+        to_prep or removed or not os.path.isfile(DUPLICATES_CSV)
+    ):
+        find_duplicates()
+    return failures
 
 
-def load_to_postgres():
-    db = get_postgres_db_name()
-    if db not in subprocess.getoutput("psql -l"):
-        subprocess.run("createdb {}".format(db), shell=True)
-        subprocess.run(
-            "psql {} -f create_voter_tables.sql".format(db), shell=True
+STAGING_TABLE = "voters_voter_staging"
+# One long-lived database that delta_to_postgres keeps current
+VOTER_DELTA_DB = os.getenv("VOTER_DELTA_DB", "voter_data")
+# "text" keeps every value a string, as the Voter model has them;
+# "compact" gives new databases typed columns (see CompactVoter)
+VOTER_SCHEMA = os.getenv("VOTER_SCHEMA", "text")
+VOTER_TABLE_SQL = {
+    "text": "create_voter_tables.sql",
+    "compact": "create_compact_voter_tables.sql",
+}[VOTER_SCHEMA]
+DELTA_SQL_FILES = (
+    VOTER_TABLE_SQL,
+    "delta_voter_tables.sql",
+    "index_voter_tables.sql",
+)
+BULK_MAINTENANCE_WORK_MEM = os.getenv("BULK_MAINTENANCE_WORK_MEM", "1GB")
+# How long a partition swap waits for readers before trying again
+PARTITION_LOCK_TIMEOUT = os.getenv("PARTITION_LOCK_TIMEOUT", "2s")
+PARTITION_SWAP_ATTEMPTS = 5
+VOTER_COPY_COLUMNS = (
+    "lname, fname, mname, suffix, addr1, addr2, city, zipcode, gender, "
+    "race, birthdate, party, areacode, phone, email, exemption_requested, "
+    "registration_date, active, voter_id"
+)
+# Columns COPYed for each loaded row; see load_row()
+LOAD_COPY_COLUMNS = f"{VOTER_COPY_COLUMNS}, county_slug, search_name"
+# Brings databases made before search_name up to date
+SEARCH_UPGRADE_STATEMENTS = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "ALTER TABLE voters_voter "
+    "ADD COLUMN IF NOT EXISTS search_name varchar(255)",
+]
+SEARCH_INDEX_STATEMENT = (
+    "CREATE INDEX IF NOT EXISTS voters_voter_search_name "
+    "ON voters_voter USING gin (search_name gin_trgm_ops)"
+)
+
+
+def load_row(row, slug):
+    """
+    Add the county slug and search name to a prepped row for COPY.
+
+    search_name holds the normalized "LNAME FNAME" that the trigram index
+    and Voter.objects.search() work from.
+    """
+    return row + [slug, normalize_name(row[0], row[1])]
+
+
+def seed_code_tables(connection):
+    """
+    Fill a compact database's race and party tables; return their ids.
+
+    Race ids are the raw race codes. Party ids are handed out as labels
+    first appear, so a label keeps its id from one voter disk to the next.
+    Nothing is committed here.
+    """
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            "INSERT INTO voters_race (id, label) VALUES (%s, %s) "
+            "ON CONFLICT DO NOTHING",
+            [(int(code), label) for code, label in _RACE.items()],
+        )
+        cursor.execute(
+            "INSERT INTO voters_party (label) "
+            "SELECT label FROM unnest(%s) AS label "
+            "WHERE label NOT IN (SELECT label FROM voters_party)",
+            (sorted(set(_PARTY.values()) | {"OTHER"}),),
+        )
+        cursor.execute("SELECT label, id FROM voters_race")
+        races = dict(cursor.fetchall())
+        cursor.execute("SELECT label, id FROM voters_party")
+        parties = dict(cursor.fetchall())
+    return races, parties
+
+
+def is_compact(connection):
+    """Return whether voters_voter was built with VOTER_SCHEMA=compact."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT data_type FROM information_schema.columns "
+            "WHERE table_name = 'voters_voter' AND column_name = 'birthdate'"
+        )
+        (birthdate_type,) = cursor.fetchone()
+    return birthdate_type == "date"
+
+
+def get_row_loader(connection):
+    """
+    Return the function that turns prepped rows into rows to COPY.
+
+    That's load_row() for the text schema. If voters_voter was built with
+    VOTER_SCHEMA=compact, the values are typed on the way in as well:
+    race and party labels become ids, dates become ISO dates and
+    gender a single letter.
+    """
+    if not is_compact(connection):
+        return load_row
+    races, parties = seed_code_tables(connection)
+    gender, race, birthdate, party, registered = [
+        LOAD_COLUMNS.index(column)
+        for column in (
+            "gender",
+            "race",
+            "birthdate",
+            "party",
+            "registration_date",
+        )
+    ]
+
+    def compact_row(row, slug):
+        row = load_row(row, slug)
+        row[gender] = row[gender][:1]
+        row[race] = races.get(row[race])
+        row[birthdate] = iso_date(row[birthdate])
+        row[party] = parties.get(row[party])
+        row[registered] = iso_date(row[registered])
+        return row
+
+    return compact_row
+
+
+def get_batch_loader(connection):
+    """
+    Return the function that turns Parquet record batches into ones to COPY.
+
+    It does what get_row_loader()'s function does to rows, a column at a
+    time with pyarrow.compute. Only search_name is still worked out value
+    by value, with the cached normalize_name().
+    """
+    pa = import_pyarrow()[0]
+    pc = pa.compute
+    compact = is_compact(connection)
+    if compact:
+        races, parties = seed_code_tables(connection)
+    gender, race, birthdate, party, registered = [
+        LOAD_COLUMNS.index(column)
+        for column in (
+            "gender",
+            "race",
+            "birthdate",
+            "party",
+            "registration_date",
+        )
+    ]
+
+    def decoded(array):
+        if pa.types.is_dictionary(array.type):
+            return array.dictionary_decode()
+        return array
+
+    def code_ids(array, codes):
+        indexes = pc.index_in(
+            decoded(array), value_set=pa.array(list(codes), pa.string())
+        )
+        return pa.array(list(codes.values()), pa.int16()).take(indexes)
+
+    def dates(array):
+        # iso_date() runs once per distinct value, so its lenient
+        # parsing (unpadded or space-padded parts) carries over exactly
+        if not pa.types.is_dictionary(array.type):
+            array = array.dictionary_encode()
+        values = [
+            iso_date(value) or None for value in array.dictionary.to_pylist()
+        ]
+        parsed = pa.array(values, pa.string()).cast(pa.date32())
+        return parsed.take(array.indices)
+
+    def load_batch(batch, slug):
+        arrays = list(batch.columns)
+        search_names = map(
+            normalize_name, arrays[0].to_pylist(), arrays[1].to_pylist()
+        )
+        if compact:
+            arrays[gender] = pc.utf8_slice_codeunits(
+                decoded(arrays[gender]), 0, 1
+            )
+            arrays[race] = code_ids(arrays[race], races)
+            arrays[birthdate] = dates(arrays[birthdate])
+            arrays[party] = code_ids(arrays[party], parties)
+            arrays[registered] = dates(arrays[registered])
+        arrays.append(pa.array([slug] * batch.num_rows, pa.string()))
+        arrays.append(pa.array(list(search_names), pa.string()))
+        return pa.RecordBatch.from_arrays(
+            arrays, names=LOAD_COPY_COLUMNS.split(", ")
         )
-    for each in no_dotfiles(LOADBASE):
-        slug = each[:3]
-        if slug in FL_COUNTIES:
-            load_county_to_postgres(db, each, slug)
-    subprocess.run("psql {} -f index_voter_tables.sql".format(db), shell=True)
+
+    return load_batch
+
+
+def create_postgres_db(db, sql_files=(VOTER_TABLE_SQL,)):
+    """Create and set up the voter database, if it doesn't exist yet."""
+    server = psycopg2.connect(dbname="postgres")
+    server.autocommit = True
+    try:
+        with server.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_database WHERE datname = %s", (db,)
+            )
+            if cursor.fetchone():
+                return
+            cursor.execute(f'CREATE DATABASE "{db}"')
+    finally:
+        server.close()
+    connection = connect_postgres(db)
+    try:
+        for sql_file in sql_files:
+            run_sql_file(connection, sql_file)
+    finally:
+        connection.close()
+
+
+def connect_postgres(db):
+    """Connect to a voter database, sending text as UTF-8."""
+    return psycopg2.connect(dbname=db, client_encoding="UTF8")
+
+
+def upgrade_voter_table(connection, index=True):
+    """
+    Add search_name to a voter table made before it existed.
+
+    Runs in the caller's transaction. Loads that build their indexes
+    afterwards pass index=False, so COPY doesn't have to keep the
+    trigram index up to date row by row.
+    """
+    with connection.cursor() as cursor:
+        for statement in SEARCH_UPGRADE_STATEMENTS:
+            cursor.execute(statement)
+        if index:
+            cursor.execute(SEARCH_INDEX_STATEMENT)
+
+
+def load_to_postgres(partitioned=None):
+    """
+    Create a Postgres database from the prepped load files and index it.
+
+    With --partitioned, hands off to load_partitions_to_postgres().
+    """
+    if partitioned is None:
+        partitioned = "--partitioned" in sys.argv[1:]
+    if partitioned:
+        return load_partitions_to_postgres()
+    db = get_postgres_db_name()
+    create_postgres_db(db)
+    connection = connect_postgres(db)
+    try:
+        upgrade_voter_table(connection, index=False)
+        connection.commit()
+        for each in no_dotfiles(LOADBASE):
+            slug = each[:3]
+            if slug in FL_COUNTIES:
+                load_county_to_postgres(connection, each, slug)
+        run_sql_file(connection, "index_voter_tables.sql")
+    finally:
+        connection.close()
     print(f"Created database {db}\n Now purging directories ...")
     purge_directories()
 
 
-def load_county_to_postgres(db, file_name, slug):
-    set_county_command = (
-        'echo "ALTER TABLE voters_voter ALTER COLUMN county_slug '
-        "SET DEFAULT '{}';\" | psql {}".format(slug, db)
+def load_county_to_postgres(connection, file_name, slug, table="voters_voter"):
+    """
+    COPY one prepped county load file from LOADBASE into voters_voter.
+
+    Parquet load files go to Postgres a record batch at a time, without
+    being turned into Python rows.
+    """
+    if file_name.endswith(".parquet"):
+        batch_loader = get_batch_loader(connection)
+        sink = ArrowCopySink(connection, table, LOAD_COPY_COLUMNS)
+        run_pipeline(
+            parquet_batches(f"{LOADBASE}/{file_name}", columns=LOAD_COLUMNS),
+            sink,
+            transform=lambda batch: batch_loader(batch, slug),
+        )
+        connection.commit()
+        return sink.rows
+    row_loader = get_row_loader(connection)
+    stats = run_pipeline(
+        load_file_rows(file_name),
+        PostgresCopySink(connection, table, LOAD_COPY_COLUMNS),
+        transform=lambda row: row_loader(row, slug),
+    )
+    connection.commit()
+    return stats.rows
+
+
+def copy_county_rows(connection, filename, table="voters_voter"):
+    """
+    COPY one raw county file's prepped rows into voters_voter, or table.
+
+    Rows stream from the prep pipeline, unsorted, with county_slug and
+    search_name filled in per row, and typed to suit a compact database;
+    the county is committed as one transaction.
+    """
+    slug = filename[:3]
+    row_loader = get_row_loader(connection)
+    stats = run_pipeline(
+        prepped_rows(filename, sort=False),
+        PostgresCopySink(connection, table, LOAD_COPY_COLUMNS),
+        transform=lambda row: row_loader(row, slug),
+    )
+    connection.commit()
+    return stats.rows
+
+
+def stream_to_postgres(bulk=None):
+    """
+    Prep raw county files and COPY them straight into Postgres.
+
+    Skips the LOADBASE CSVs and the per-county psql processes
+    by streaming every county over one database connection.
+    With --bulk, hands off to bulk_load_to_postgres().
+    """
+    if bulk is None:
+        bulk = "--bulk" in sys.argv[1:]
+    if bulk:
+        return bulk_load_to_postgres()
+    db = get_postgres_db_name()
+    create_postgres_db(db)
+    voter_files = sorted(no_dotfiles(RAWBASE))
+    valid_files = [f for f in voter_files if f[:3] in FL_COUNTIES]
+    connection = connect_postgres(db)
+    try:
+        upgrade_voter_table(connection, index=False)
+        connection.commit()
+        for i, each in enumerate(valid_files):
+            loadstart = datetime.datetime.now()
+            row_count = copy_county_rows(connection, each)
+            print(
+                f"{i + 1}: Loaded {row_count} rows for "
+                f"{FL_COUNTIES.get(each[:3])} in "
+                f"{datetime.datetime.now() - loadstart}"
+            )
+        run_sql_file(connection, "index_voter_tables.sql")
+    finally:
+        connection.close()
+    print(f"Created database {db}")
+
+
+def get_index_statements(table="voters_voter"):
+    """Return the CREATE INDEX statements from index_voter_tables.sql."""
+    with open("index_voter_tables.sql", "r") as index_sql:
+        statements = [
+            line.strip() for line in index_sql if line.startswith("CREATE")
+        ]
+    # retarget both the table and the index names
+    return [st.replace('"voters_voter', f'"{table}') for st in statements]
+
+
+def run_index_statement(db, statement):
+    """Build one index on its own connection, with bulk-load settings."""
+    connection = connect_postgres(db)
+    connection.autocommit = True
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SET maintenance_work_mem = %s", (BULK_MAINTENANCE_WORK_MEM,)
+            )
+            cursor.execute(statement)
+    finally:
+        connection.close()
+
+
+def get_index_workers():
+    """Return how many indexes to build at once, from --index-workers=N."""
+    return int(
+        get_option("index-workers", os.getenv("BULK_INDEX_WORKERS", "4"))
+    )
+
+
+def build_indexes(db, statements, workers):
+    """Run CREATE INDEX statements across up to workers connections."""
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(run_index_statement, db, statement)
+            for statement in statements
+        ]
+        for future in as_completed(futures):
+            future.result()
+
+
+def bulk_load_to_postgres(workers=None):
+    """
+    Load all counties through an UNLOGGED staging table, then swap it in.
+
+    - COPY every county into an UNLOGGED copy of voters_voter,
+      which has no primary key or indexes yet
+    - Make the table LOGGED, then build its indexes in parallel across
+      --index-workers=N (or BULK_INDEX_WORKERS) connections, each with
+      maintenance_work_mem set to BULK_MAINTENANCE_WORK_MEM
+    - ANALYZE, then replace voters_voter with it in one transaction
+
+    If a run dies midway, voters_voter is untouched, and the leftover
+    staging table is dropped by the next run.
+    """
+    if workers is None:
+        workers = get_index_workers()
+    db = get_postgres_db_name()
+    create_postgres_db(db)
+    voter_files = sorted(no_dotfiles(RAWBASE))
+    valid_files = [f for f in voter_files if f[:3] in FL_COUNTIES]
+    staging_pkey = f"{STAGING_TABLE}_pkey"
+    connection = connect_postgres(db)
+    try:
+        upgrade_voter_table(connection, index=False)
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+            cursor.execute(
+                f"CREATE UNLOGGED TABLE {STAGING_TABLE} "
+                "(LIKE voters_voter INCLUDING DEFAULTS)"
+            )
+        connection.commit()
+        for i, each in enumerate(valid_files):
+            loadstart = datetime.datetime.now()
+            row_count = copy_county_rows(connection, each, table=STAGING_TABLE)
+            print(
+                f"{i + 1}: Loaded {row_count} rows for "
+                f"{FL_COUNTIES.get(each[:3])} in "
+                f"{datetime.datetime.now() - loadstart}"
+            )
+        indexstart = datetime.datetime.now()
+        with connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {STAGING_TABLE} SET LOGGED")
+        connection.commit()
+        statements = get_index_statements(table=STAGING_TABLE)
+        statements.append(
+            f'CREATE UNIQUE INDEX "{staging_pkey}" '
+            f'ON "{STAGING_TABLE}" ("id");'
+        )
+        build_indexes(db, statements, workers)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"ALTER TABLE {STAGING_TABLE} ADD CONSTRAINT {staging_pkey} "
+                f"PRIMARY KEY USING INDEX {staging_pkey}"
+            )
+            cursor.execute(f"ANALYZE {STAGING_TABLE}")
+        connection.commit()
+        print(
+            f"Indexed and analyzed {STAGING_TABLE} in "
+            f"{datetime.datetime.now() - indexstart}"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "ALTER SEQUENCE voters_voter_id_seq "
+                f"OWNED BY {STAGING_TABLE}.id"
+            )
+            cursor.execute("DROP TABLE voters_voter")
+            cursor.execute(
+                f"ALTER TABLE {STAGING_TABLE} RENAME TO voters_voter"
+            )
+            index_names = [staging_pkey] + [
+                statement.split('"')[1] for statement in statements[:-1]
+            ]
+            for index_name in index_names:
+                live_name = index_name.replace(STAGING_TABLE, "voters_voter")
+                cursor.execute(
+                    f"ALTER INDEX {index_name} RENAME TO {live_name}"
+                )
+        connection.commit()
+    finally:
+        connection.close()
+    print(f"Created database {db}")
+
+
+def partition_name(slug):
+    """Name the voters_voter partition that holds a county's voters."""
+    return f"voters_voter_{slug.lower()}"
+
+
+def partition_voter_table(connection):
+    """
+    Make voters_voter a table list-partitioned by county_slug.
+
+    A new, empty voters_voter is rebuilt as a partitioned table with the
+    same columns and the indexes in index_voter_tables.sql, which
+    each county's partition brings along when it is attached.
+    Returns False, leaving the table alone, if it already holds rows
+    that aren't partitioned.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relkind FROM pg_class "
+            "WHERE oid = 'voters_voter'::regclass"
+        )
+        if cursor.fetchone()[0] == "p":
+            return True
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM voters_voter)")
+        if cursor.fetchone()[0]:
+            return False
+        cursor.execute(
+            "CREATE TABLE voters_voter_partitioned "
+            "(LIKE voters_voter INCLUDING DEFAULTS) "
+            "PARTITION BY LIST (county_slug)"
+        )
+        cursor.execute(
+            "ALTER SEQUENCE voters_voter_id_seq "
+            "OWNED BY voters_voter_partitioned.id"
+        )
+        cursor.execute("DROP TABLE voters_voter")
+        cursor.execute(
+            "ALTER TABLE voters_voter_partitioned RENAME TO voters_voter"
+        )
+        for statement in get_index_statements():
+            cursor.execute(statement)
+    connection.commit()
+    return True
+
+
+def load_partition(connection, db, file_name, workers):
+    """
+    Load a county's load file into a new table and swap it in.
+
+    The rows are COPYed into a standalone table, which is then indexed,
+    analyzed and checked to hold only that county, all before
+    voters_voter is touched. Only the swap itself, in swap_partition(),
+    locks voters_voter.
+    """
+    slug = file_name[:3]
+    partition = partition_name(slug)
+    loading = f"{partition}_load"
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {loading}")
+        cursor.execute(
+            f"CREATE TABLE {loading} (LIKE voters_voter INCLUDING DEFAULTS)"
+        )
+        # lets ATTACH PARTITION skip scanning the rows to check them
+        cursor.execute(
+            f"ALTER TABLE {loading} ADD CONSTRAINT {partition}_county_slug "
+            "CHECK (county_slug IS NOT NULL AND county_slug = %s)",
+            (slug,),
+        )
+    connection.commit()
+    row_count = load_county_to_postgres(connection, file_name, slug, loading)
+    statements = get_index_statements(table=loading)
+    statements.append(
+        f'CREATE UNIQUE INDEX "{loading}_pkey" ON "{loading}" ("id");'
     )
-    subprocess.run(set_county_command, shell=True)
-    load_county_command = (
-        'echo "COPY voters_voter (lname, fname, mname, suffix, addr1, addr2, '
-        "city, zipcode, gender, race, birthdate, party, areacode, phone, email, "
-        "exemption_requested, registration_date, active, voter_id) "
-        f"FROM '{LOADBASE}/{slug}.csv' CSV HEADER;\" | psql {db}"
+    build_indexes(db, statements, workers)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"ALTER TABLE {loading} ADD CONSTRAINT {loading}_pkey "
+            f"PRIMARY KEY USING INDEX {loading}_pkey"
+        )
+        cursor.execute(f"ANALYZE {loading}")
+    connection.commit()
+    swap_partition(
+        connection,
+        slug,
+        [statement.split('"')[1] for statement in statements],
     )
-    subprocess.run(load_county_command, shell=True)
+    return row_count
 
 
-def export_county(countyfile):
-    """Export one county CSV file to Panda."""
-    put_data = {"objects": []}
+def swap_partition(connection, slug, index_names):
+    """
+    Replace a county's partition of voters_voter with its loaded table.
+
+    In one transaction, the old partition, if any, is detached and
+    dropped, and the loaded table and its indexes take its names and
+    are attached in its place. Detaching briefly locks out readers of
+    voters_voter, so the swap waits at most PARTITION_LOCK_TIMEOUT for
+    running queries to finish, then backs off and tries again, rather
+    than leaving new queries queued behind it.
+    """
+    partition = partition_name(slug)
+    loading = f"{partition}_load"
+    for attempt in range(1, PARTITION_SWAP_ATTEMPTS + 1):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SET LOCAL lock_timeout = %s", (PARTITION_LOCK_TIMEOUT,)
+                )
+                cursor.execute("SELECT to_regclass(%s)", (partition,))
+                if cursor.fetchone()[0]:
+                    cursor.execute(
+                        "ALTER TABLE voters_voter "
+                        f"DETACH PARTITION {partition}"
+                    )
+                    cursor.execute(f"DROP TABLE {partition}")
+                cursor.execute(f"ALTER TABLE {loading} RENAME TO {partition}")
+                for index_name in index_names:
+                    cursor.execute(
+                        f"ALTER INDEX {index_name} RENAME TO "
+                        f"{index_name.replace(loading, partition)}"
+                    )
+                cursor.execute(
+                    f"ALTER TABLE voters_voter ATTACH PARTITION {partition} "
+                    "FOR VALUES IN (%s)",
+                    (slug,),
+                )
+            connection.commit()
+            return
+        except psycopg2.errors.LockNotAvailable:
+            connection.rollback()
+            if attempt == PARTITION_SWAP_ATTEMPTS:
+                raise
+            print(f"Waiting for queries on voters_voter to swap in {slug}")
+            time.sleep(attempt)
+
+
+def load_partitions_to_postgres(counties=None, workers=None):
+    """
+    Load prepped counties into a voters_voter partitioned by county.
+
+    Each county in LOADBASE, or just those named with --counties=HIL,PIN,
+    gets its own partition, loaded and indexed on its own, then swapped
+    in (see load_partition()). Reloading a county replaces only its
+    partition, while the others, and readers of voters_voter, carry on,
+    and only its files are purged afterwards.
+    Index builds use --index-workers=N connections, as with --bulk.
+    """
+    if counties is None:
+        counties = get_option("counties", "")
+        counties = [slug.strip().upper() for slug in counties.split(",")]
+    counties = [slug for slug in counties if slug]
+    if workers is None:
+        workers = get_index_workers()
+    db = get_postgres_db_name()
+    create_postgres_db(db)
+    load_files = [
+        each
+        for each in sorted(no_dotfiles(LOADBASE))
+        if each[:3] in FL_COUNTIES and (not counties or each[:3] in counties)
+    ]
+    connection = connect_postgres(db)
+    try:
+        upgrade_voter_table(connection, index=False)
+        connection.commit()
+        if not partition_voter_table(connection):
+            print(
+                f"voters_voter in {db} already holds voters "
+                "and isn't partitioned by county; "
+                "drop it to build a partitioned database"
+            )
+            return
+        # an older partitioned table gets its trigram index here
+        upgrade_voter_table(connection)
+        connection.commit()
+        for i, each in enumerate(load_files):
+            loadstart = datetime.datetime.now()
+            row_count = load_partition(connection, db, each, workers)
+            print(
+                f"{i + 1}: Loaded {row_count} rows for "
+                f"{FL_COUNTIES.get(each[:3])} into "
+                f"{partition_name(each[:3])} in "
+                f"{datetime.datetime.now() - loadstart}"
+            )
+    finally:
+        connection.close()
+    print(f"Loaded {len(load_files)} county partitions into {db}")
+    if counties:
+        # a partial reload leaves the other counties' files alone
+        print(" Now purging the reloaded counties' files ...")
+        purge_county_files(counties)
+    else:
+        print(" Now purging directories ...")
+        purge_directories()
+
+
+def fingerprint_row(row):
+    """Hash a prepped row, county slug included, to spot changed voters."""
+    return hashlib.md5("\x1f".join(row).encode("utf-8")).hexdigest()
+
+
+DELTA_ASSIGNMENTS = ", ".join(
+    f"{column} = i.{column}"
+    for column in LOAD_COPY_COLUMNS.split(", ") + ["row_hash"]
+)
+DELTA_STATEMENTS = [
+    (
+        "deleted",
+        """
+        WITH changed AS (
+            DELETE FROM voters_voter v
+            WHERE v.county_slug IN (
+                SELECT DISTINCT county_slug FROM voters_incoming
+            )
+            AND NOT EXISTS (
+                SELECT 1 FROM voters_incoming i WHERE i.voter_id = v.voter_id
+            )
+            RETURNING v.voter_id, v.county_slug
+        )
+        INSERT INTO voters_voterchange
+            (voter_id, county_slug, change_type, source_date)
+        SELECT voter_id, county_slug, 'D', %(source_date)s FROM changed
+        """,
+    ),
+    (
+        "updated",
+        f"""
+        WITH changed AS (
+            UPDATE voters_voter v
+            SET {DELTA_ASSIGNMENTS}, source_date = %(source_date)s
+            FROM voters_incoming i
+            WHERE i.voter_id = v.voter_id
+            AND v.row_hash IS DISTINCT FROM i.row_hash
+            RETURNING v.voter_id, v.county_slug
+        )
+        INSERT INTO voters_voterchange
+            (voter_id, county_slug, change_type, source_date)
+        SELECT voter_id, county_slug, 'U', %(source_date)s FROM changed
+        """,
+    ),
+    (
+        "inserted",
+        f"""
+        WITH changed AS (
+            INSERT INTO voters_voter
+                ({LOAD_COPY_COLUMNS}, row_hash, source_date)
+            SELECT {LOAD_COPY_COLUMNS}, row_hash, %(source_date)s
+            FROM voters_incoming i
+            WHERE NOT EXISTS (
+                SELECT 1 FROM voters_voter v WHERE v.voter_id = i.voter_id
+            )
+            RETURNING voter_id, county_slug
+        )
+        INSERT INTO voters_voterchange
+            (voter_id, county_slug, change_type, source_date)
+        SELECT voter_id, county_slug, 'I', %(source_date)s FROM changed
+        """,
+    ),
+]
+
+
+def delta_to_postgres():
+    """
+    Bring the VOTER_DELTA_DB database up to date with the raw county files.
+
+    Instead of a fresh database per voter disk, this keeps one database
+    and applies only the differences since the last disk:
+    - COPY every prepped row, with a fingerprint, into a temp table
+    - delete voters who are gone, update voters whose fingerprint changed
+      and insert new voters, matching on voter_id; only voters in the
+      counties that were staged can be deleted, so a county file missing
+      from RAWBASE leaves its voters alone
+    - log each change, with VOTER_DATA_DATE as its source_date,
+      in voters_voterchange
+
+    It all runs in one transaction, so a failed run changes nothing.
+    If a voter_id shows up in more than one county file, one row is kept.
+    """
+    db = VOTER_DELTA_DB
+    create_postgres_db(db, sql_files=DELTA_SQL_FILES)
+    deltastart = datetime.datetime.now()
+    voter_files = sorted(no_dotfiles(RAWBASE))
+    valid_files = [f for f in voter_files if f[:3] in FL_COUNTIES]
+    connection = connect_postgres(db)
+    try:
+        upgrade_voter_table(connection)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE TEMP TABLE voters_incoming ON COMMIT DROP AS "
+                f"SELECT {LOAD_COPY_COLUMNS}, row_hash "
+                "FROM voters_voter WITH NO DATA"
+            )
+            row_loader = get_row_loader(connection)
+            for each in valid_files:
+                slug = each[:3]
+                stats = run_pipeline(
+                    prepped_rows(each, sort=False),
+                    PostgresCopySink(
+                        connection,
+                        "voters_incoming",
+                        f"{LOAD_COPY_COLUMNS}, row_hash",
+                    ),
+                    transform=lambda row: row_loader(row, slug)
+                    + [fingerprint_row(row + [slug])],
+                )
+                print(f"Staged {stats.rows} rows for {FL_COUNTIES[slug]}")
+            cursor.execute(
+                "CREATE INDEX voters_incoming_voter_id "
+                "ON voters_incoming (voter_id)"
+            )
+            cursor.execute(
+                "DELETE FROM voters_incoming a USING voters_incoming b "
+                "WHERE a.voter_id = b.voter_id AND a.ctid > b.ctid"
+            )
+            cursor.execute("ANALYZE voters_incoming")
+            # fill in search_name for rows loaded before it existed
+            cursor.execute(
+                "UPDATE voters_voter v SET search_name = i.search_name "
+                "FROM voters_incoming i "
+                "WHERE i.voter_id = v.voter_id AND v.search_name IS NULL"
+            )
+            counts = {}
+            for change, statement in DELTA_STATEMENTS:
+                cursor.execute(statement, {"source_date": VOTER_DATA_DATE})
+                counts[change] = cursor.rowcount
+        connection.commit()
+    finally:
+        connection.close()
+    print(
+        "Applied {} data to {}: {} inserted, {} updated, {} deleted; "
+        "took {}".format(
+            VOTER_DATA_DATE,
+            db,
+            counts["inserted"],
+            counts["updated"],
+            counts["deleted"],
+            datetime.datetime.now() - deltastart,
+        )
+    )
+    return counts
+
+
+# Earliest year to give its own voters_voterhistory partition
+HISTORY_START_YEAR = int(os.getenv("HISTORY_START_YEAR", "2000"))
+HISTORY_COPY_COLUMNS = (
+    "voter_id, county_slug, election_date, election_type, "
+    "history_code, history"
+)
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def iso_date(value):
+    """Turn an MM/DD/YYYY date into ISO form, or "" if invalid."""
+    try:
+        month, day, year = (int(bit) for bit in value.split("/"))
+        return datetime.date(year, month, day).isoformat()
+    except ValueError:
+        return ""
+
+
+def stream_history_rows(filename):
+    """
+    Yield decoded rows from a raw tab-delimited voter history file.
+
+    History files hold one row per voter per election:
+    county, voter ID, election date, election type and history code.
+    Rows are read one at a time, so memory use doesn't grow with the file,
+    and badly encoded lines are repaired as they're read.
+    """
+    slug = filename[:3]
+    history_text = RepairedText(f"{HISTBASE}/{filename}")
+    for row in csv.reader(history_text, delimiter="\t"):
+        if len(row) < 5:
+            continue
+        code = row[4].strip()
+        yield [
+            row[1].strip(),
+            slug,
+            iso_date(row[2].strip()),
+            row[3].strip(),
+            code,
+            HISTORY_CODES.get(code, ""),
+        ]
+    report_repairs(filename, history_text)
+
+
+def prep_history_table(connection):
+    """Create voters_voterhistory and its yearly partitions as needed."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass('voters_voterhistory')")
+        if cursor.fetchone()[0] is None:
+            with open("create_history_tables.sql", "r") as history_sql:
+                cursor.execute(history_sql.read())
+        for year in range(HISTORY_START_YEAR, YEAR + 1):
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS voters_voterhistory_{year} "
+                "PARTITION OF voters_voterhistory "
+                f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+            )
+    connection.commit()
+
+
+def load_history():
+    """
+    Stream county voter history files into the voters_voterhistory table.
+
+    The table is range-partitioned by election date, one partition a year
+    from HISTORY_START_YEAR, and indexed on voter_id. Each county's rows
+    replace any it already had, in one transaction per county. Once
+    they're all loaded, the history files are purged from HISTBASE.
+    """
+    db = get_postgres_db_name()
+    create_postgres_db(db)
+    history_files = sorted(no_dotfiles(HISTBASE))
+    valid_files = [f for f in history_files if f[:3] in FL_COUNTIES]
+    print(f"Loading {len(valid_files)} county voter history files")
+    connection = connect_postgres(db)
+    try:
+        prep_history_table(connection)
+        for i, each in enumerate(valid_files):
+            loadstart = datetime.datetime.now()
+            slug = each[:3]
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "DELETE FROM voters_voterhistory WHERE county_slug = %s",
+                    (slug,),
+                )
+            stats = run_pipeline(
+                stream_history_rows(each),
+                PostgresCopySink(
+                    connection, "voters_voterhistory", HISTORY_COPY_COLUMNS
+                ),
+            )
+            connection.commit()
+            print(
+                f"{i + 1}: Loaded {stats.rows} history rows for "
+                f"{FL_COUNTIES[slug]} in "
+                f"{datetime.datetime.now() - loadstart}"
+            )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS voters_voterhistory_voter_id "
+                "ON voters_voterhistory (voter_id)"
+            )
+        connection.commit()
+    finally:
+        connection.close()
+    print(f"Loaded history into {db}\n Now purging history files ...")
+    purge_directories(dirs=[HISTBASE])
+
+
+def checkpoint_path(dataset_slug):
+    """Return the path of a PANDA dataset's export checkpoint in LOADED."""
+    return f"{LOADED}/{dataset_slug}.json"
+
+
+def read_checkpoint(dataset_slug):
+    """Load a dataset's export checkpoint, or {} if it has none."""
+    path = checkpoint_path(dataset_slug)
+    if not os.path.isfile(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def write_checkpoint(dataset_slug, checkpoint):
+    """Save a dataset's export checkpoint, replacing the old one atomically."""
+    path = checkpoint_path(dataset_slug)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(checkpoint, f, indent=2, sort_keys=True)
+    os.replace(f"{path}.tmp", path)
+
+
+def fingerprints_path(dataset_slug):
+    """Return the path of a PANDA dataset's fingerprint index in LOADED."""
+    return f"{LOADED}/{dataset_slug}_fingerprints.csv"
+
+
+def read_fingerprints(dataset_slug):
+    """Load a dataset's external_id -> row hash index, or {} if none."""
+    path = fingerprints_path(dataset_slug)
+    if not os.path.isfile(path):
+        return {}
+    with open(path, "r", newline="") as f:
+        return dict(csv.reader(f))
+
+
+def write_fingerprints(dataset_slug, fingerprints):
+    """Save a dataset's fingerprint index, replacing the old one atomically."""
+    path = fingerprints_path(dataset_slug)
+    with open(f"{path}.tmp", "w", newline="") as f:
+        csv.writer(f).writerows(fingerprints.items())
+    os.replace(f"{path}.tmp", path)
+
+
+def export_county(countyfile, in_flight=None, resume=None, delta=None):
+    """
+    Export one county load file to Panda.
+
+    Batches go out over keep-alive sessions, with up to in_flight
+    (--in-flight=N or PANDA_IN_FLIGHT) of them outstanding at once.
+
+    Each acknowledged batch is checkpointed in LOADED. With resume
+    (--resume), an export picks up after the last acknowledged row,
+    and a finished one is skipped, as long as the county's load file
+    hasn't changed since.
+
+    A finished export leaves an external_id -> row hash index in LOADED.
+    With delta (--delta), only rows that are new or changed since then
+    are sent, and voters who are gone are deleted from the dataset.
+    A delta export isn't checkpointed; a failed one can simply be rerun.
+    """
+    if in_flight is None:
+        in_flight = int(get_option("in-flight", PANDA_IN_FLIGHT))
+    if resume is None:
+        resume = "--resume" in sys.argv
+    if delta is None:
+        delta = "--delta" in sys.argv
     putstart = datetime.datetime.now()
     putcount = 0
     slug = countyfile[:3]
@@ -468,55 +2201,144 @@ def export_county(countyfile):
         dataset_slug = slugify(name)
         dataset_url = "{}/{}/".format(PANDA_DATASET_BASE, dataset_slug)
         data_url = "{}data/".format(dataset_url)
-        # initialize new dataset
-        dataset = {
-            "name": name,
-            "description": "Data from {}".format(VOTER_DATA_DATE),
-            "categories": [
-                "/api/1.0/category/all-dob/",
-                "/api/1.0/category/voters/",
-            ],
+        exported = read_fingerprints(dataset_slug) if delta else {}
+        if delta and not exported:
+            print(f"{county}: no earlier export to compare; sending all rows")
+        stat = os.stat(f"{LOADBASE}/{countyfile}")
+        checkpoint = {
+            "countyfile": countyfile,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "rows": 0,
+            "batches": 0,
+            "complete": False,
         }
-        panda_put(
-            dataset_url,
-            json.dumps(dataset),
-            params={"columns": ",".join(VOTER_COLUMNS)},
+        if resume and not exported:
+            previous = read_checkpoint(dataset_slug)
+            if all(
+                previous.get(key) == checkpoint[key]
+                for key in ("countyfile", "size", "mtime")
+            ):
+                checkpoint = previous
+            if checkpoint["complete"]:
+                print(f"{county}: already exported; skipping")
+                return putcount
+        if checkpoint["rows"]:
+            print(
+                f"{county}: resuming after {checkpoint['rows']} rows "
+                f"in {checkpoint['batches']} batches"
+            )
+        elif not exported:
+            # initialize new dataset
+            dataset = {
+                "name": name,
+                "description": "Data from {}".format(VOTER_DATA_DATE),
+                "categories": [
+                    "/api/1.0/category/all-dob/",
+                    "/api/1.0/category/voters/",
+                ],
+            }
+            put_with_retries(
+                dataset_url,
+                json.dumps(dataset),
+                params={"columns": ",".join(VOTER_COLUMNS)},
+            )
+
+        def record_ack(rows):
+            checkpoint["rows"] += rows
+            checkpoint["batches"] += 1
+            write_checkpoint(dataset_slug, checkpoint)
+
+        if not exported:
+            write_checkpoint(dataset_slug, checkpoint)
+        fingerprints = {}
+
+        def changed_record(item):
+            position, row = item
+            voter_id = row[VOTER_ID_INDEX]
+            fingerprint = fingerprint_row(row)
+            fingerprints[voter_id] = fingerprint
+            if (
+                position < checkpoint["rows"]
+                or exported.get(voter_id) == fingerprint
+            ):
+                return None
+            return voter_id, [row[i] for i in VOTER_ORDER]
+
+        stats = run_pipeline(
+            enumerate(load_file_rows(countyfile)),
+            PandaSink(data_url, in_flight, None if exported else record_ack),
+            transform=changed_record,
+            name=county,
+            progress_every=10000,
         )
-        with open("{}/{}".format(LOADBASE, countyfile), "r") as cfile:
-            reader = csv.DictReader(cfile)
-            for row in reader:
-                put_data["objects"].append(
-                    {
-                        "external_id": (row["voter_ID"]),
-                        "data": [row[key] for key in VOTER_COLUMNS],
-                    }
-                )
-                if len(put_data["objects"]) % 500 == 0:
-                    print("500 processed")
-                if len(put_data["objects"]) == 1000:
-                    putcount += 1000
-                    print("Updating {} rows".format(len(put_data["objects"])))
-                    panda_put(data_url, json.dumps(put_data), params={})
-                    put_data["objects"] = []
-                if putcount % 10000 == 0:
-                    print("loaded so far: {}".format(putcount))
-        if put_data["objects"]:
-            print("Updating {} rows".format(len(put_data["objects"])))
-            panda_put(data_url, json.dumps(put_data), params={})
-            putcount += len(put_data["objects"])
-            put_data["objects"] = []
+        putcount = stats.rows
+        removed = [
+            f"{data_url}{voter_id}/"
+            for voter_id in exported
+            if voter_id not in fingerprints
+        ]
+        with ThreadPoolExecutor(max_workers=in_flight) as executor:
+            for _ in executor.map(delete_with_retries, removed):
+                pass
+        write_fingerprints(dataset_slug, fingerprints)
+        if not exported:
+            checkpoint["complete"] = True
+            write_checkpoint(dataset_slug, checkpoint)
         print(
-            "pushed {} rows to panda dataset {}; process took {}".format(
-                putcount, name, (datetime.datetime.now() - putstart)
+            "pushed {} rows to panda dataset {} and deleted {}; "
+            "process took {}".format(
+                putcount,
+                name,
+                len(removed),
+                (datetime.datetime.now() - putstart),
             )
         )
         return putcount
 
 
-def export_to_panda():
-    """Export any prepped county files in LOADBASE directory to PANDA."""
-    for countyfile in no_dotfiles(LOADBASE):
-        export_county(countyfile)
+def export_to_panda(county_workers=None, resume=None, delta=None):
+    """
+    Export any prepped county files in LOADBASE directory to PANDA.
+
+    With --county-workers=N (or PANDA_COUNTY_WORKERS), N counties export
+    at once, largest first. A county that fails doesn't stop the others;
+    failures are reported at the end and returned, keyed by file name.
+    Add --resume to pick up where a failed run left off, or --delta
+    to send only what changed since each county's last export.
+    """
+    if county_workers is None:
+        county_workers = int(
+            get_option("county-workers", PANDA_COUNTY_WORKERS)
+        )
+    if resume is None:
+        resume = "--resume" in sys.argv
+    if delta is None:
+        delta = "--delta" in sys.argv
+    if not os.path.isdir(LOADED):
+        os.mkdir(LOADED)
+    county_files = [f for f in no_dotfiles(LOADBASE) if f[:3] in FL_COUNTIES]
+    county_files.sort(
+        key=lambda f: os.path.getsize(f"{LOADBASE}/{f}"), reverse=True
+    )
+    failures = {}
+    with ThreadPoolExecutor(max_workers=county_workers) as executor:
+        futures = {
+            executor.submit(
+                export_county, countyfile, resume=resume, delta=delta
+            ): countyfile
+            for countyfile in county_files
+        }
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                failures[futures[future]] = e
+    if failures:
+        print(f"{len(failures)} county files failed to export:")
+        for countyfile, error in sorted(failures.items()):
+            print(f"• {countyfile}: {error!r}")
+    return failures
 
 
 if __name__ == "__main__":
@@ -524,17 +2346,26 @@ if __name__ == "__main__":
         f"{SCRIPT_NAME} reporting for duty, "
         f"with voter data date of {VOTER_DATA_DATE}"
     )
-    if len(sys.argv) == 2:
-        if sys.argv[1] == "prep_files":
-            prep_files()
-        elif sys.argv[1] == "load_to_postgres":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if len(args) == 1:
+        if args[0] == "prep_files":
+            if prep_files():
+                sys.exit(1)
+        elif args[0] == "load_to_postgres":
             load_to_postgres()
-        elif sys.argv[1] == "export_to_panda":
-            export_to_panda()
-        elif sys.argv[1] == "purge":
+        elif args[0] == "stream_to_postgres":
+            stream_to_postgres()
+        elif args[0] == "delta_to_postgres":
+            delta_to_postgres()
+        elif args[0] == "load_history":
+            load_history()
+        elif args[0] == "export_to_panda":
+            if export_to_panda():
+                sys.exit(1)
+        elif args[0] == "purge":
             purge_directories()
         else:
-            voter_file = sys.argv[1]
+            voter_file = args[0]
             print(
                 "Prepping voter data for {} County".format(
                     FL_COUNTIES.get(voter_file[:3])
@@ -545,8 +2376,24 @@ if __name__ == "__main__":
         print(
             "Please provide either a single voter file name to process, "
             "or one of these arguments: \n"
-            "• prep_files (to prep any county files in /VoterDetail)\n"
-            "• load_to_postgres (to create and load a database)\n"
+            "• prep_files (to prep any county files in /VoterDetail;\n"
+            "  add --workers=N to prep N counties at a time,\n"
+            "  or --full to re-prep unchanged counties too)\n"
+            "• load_to_postgres (to create and load a database;\n"
+            "  add --partitioned to give each county its own partition,\n"
+            "  and --counties=HIL,PIN to reload just those counties)\n"
+            "• stream_to_postgres (to prep raw county files and load them\n"
+            "  into a database without writing prepped files;\n"
+            "  add --bulk for an UNLOGGED staging load, parallel indexing\n"
+            "  and an atomic swap)\n"
+            "• delta_to_postgres (to apply only the changes since the last\n"
+            "  voter disk to one long-lived database)\n"
+            "• load_history (to load county voter history files\n"
+            "  in /VoterHistory into the database)\n"
             "• purge (to clear voter files from prep directories)\n"
-            "• export_to_panda (to export any prepped county files to PANDA)."
+            "• export_to_panda (to export any prepped county files to PANDA;\n"
+            "  add --in-flight=N for N batches in flight per county\n"
+            "  --county-workers=N to export N counties at once,\n"
+            "  --resume to pick up after the last acknowledged batches\n"
+            "  and --delta to send only what changed since the last export)."
         )
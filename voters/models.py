@@ -1,5 +1,11 @@
+import datetime
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import TrigramSimilarity
 from django.db import models
 
+from .names import normalize_name
+
 SUFFIXES = {
     'II': 'II', 'III': 'III', 'IV': 'IV', 'V': 'V', 'VI': 'VI',
     'JR': 'Jr.', 'JR.': 'Jr.', 'SR': 'Sr.', 'SR.': 'Sr.',
@@ -78,7 +84,60 @@ COUNTY_MAP = {
 }
 
 
-class Voter(models.Model):
+class VoterQuerySet(models.QuerySet):
+
+    def search(self, name, birthdate=None):
+        """
+        Find voters by name, and by birthdate if one is given.
+
+        name is "Last, First" or just "Last", in any case and with or
+        without accents or punctuation. A trailing * on the name makes it
+        a prefix search: "Smith, J*" finds every Smith whose first name
+        starts with J. Without one, the search is fuzzy: names within
+        pg_trgm's similarity threshold match, most similar first, with
+        the similarity annotated as `similarity`.
+
+        Both kinds of search use the trigram index on search_name,
+        which the loader fills in; fuzzy searches need
+        django.contrib.postgres in INSTALLED_APPS.
+        birthdate is a date or an MM/DD/YYYY string.
+        """
+        prefix = name.rstrip().endswith('*')
+        last, _comma, first = name.replace('*', '').partition(',')
+        query = normalize_name(last, first)
+        voters = self
+        if birthdate:
+            typed = isinstance(
+                self.model._meta.get_field('birthdate'), models.DateField)
+            if typed and not isinstance(birthdate, datetime.date):
+                birthdate = datetime.datetime.strptime(
+                    birthdate, '%m/%d/%Y').date()
+            elif not typed and isinstance(birthdate, datetime.date):
+                birthdate = birthdate.strftime('%m/%d/%Y')
+            voters = voters.filter(birthdate=birthdate)
+        if prefix:
+            return voters.filter(search_name__startswith=query)
+        return voters.filter(search_name__trigram_similar=query).annotate(
+            similarity=TrigramSimilarity('search_name', query)
+        ).order_by('-similarity', 'lname', 'fname')
+
+
+class VoterDisplayMixin(object):
+    """Display helpers shared by Voter and CompactVoter."""
+
+    def __str__(self):
+        bits = [bit for bit in [self.fname, self.mname, self.lname] if bit]
+        name = ' '.join(bits)
+        if self.suffix and SUFFIXES.get(self.suffix.upper()):
+            name += ', {}'.format(SUFFIXES.get(self.suffix.upper()))
+        return name
+
+    @property
+    def county(self):
+        return COUNTY_MAP.get(self.county_slug)
+
+
+class Voter(VoterDisplayMixin, models.Model):
     lname = models.CharField(max_length=255, blank=True, null=True)
     fname = models.CharField(max_length=255, blank=True, null=True)
     mname = models.CharField(max_length=255, blank=True, null=True)
@@ -99,17 +158,111 @@ class Voter(models.Model):
     registration_date = models.CharField(max_length=255, blank=True, null=True)
     active = models.BooleanField(default=False)
     county_slug = models.CharField(max_length=255, blank=True, null=True)
+    # normalized "LNAME FNAME", filled in by the loader for search()
+    search_name = models.CharField(
+        max_length=255, blank=True, null=True, editable=False)
+
+    objects = VoterQuerySet.as_manager()
 
     class Meta:
         ordering = ['lname', 'fname']
+        indexes = [
+            models.Index(
+                fields=['lname', 'fname'], name='voters_voter_lname_fname'),
+            GinIndex(
+                fields=['search_name'],
+                name='voters_voter_search_name',
+                opclasses=['gin_trgm_ops']),
+        ]
+
+
+class Race(models.Model):
+    """A race label; ids are Florida's race codes. Compact schema only."""
+
+    id = models.SmallIntegerField(primary_key=True)
+    label = models.CharField(max_length=255, unique=True)
+
+    class Meta:
+        managed = False
+        db_table = 'voters_race'
 
     def __str__(self):
-        bits = [bit for bit in [self.fname, self.mname, self.lname] if bit]
-        name = ' '.join(bits)
-        if self.suffix and SUFFIXES.get(self.suffix.upper()):
-            name += ', {}'.format(SUFFIXES.get(self.suffix.upper()))
-        return name
+        return self.label
 
-    @property
-    def county(self):
-        return COUNTY_MAP.get(self.county_slug)
+
+class Party(models.Model):
+    """A party label, numbered as the loader first sees it. Compact only."""
+
+    id = models.SmallAutoField(primary_key=True)
+    label = models.CharField(max_length=255, unique=True)
+
+    class Meta:
+        managed = False
+        db_table = 'voters_party'
+        verbose_name_plural = 'parties'
+
+    def __str__(self):
+        return self.label
+
+
+class CompactVoter(VoterDisplayMixin, models.Model):
+    """
+    voters_voter as built with VOTER_SCHEMA=compact, for use in place of
+    Voter: dates are dates, voter_id is an integer and race and party
+    point to the Race and Party lookup tables.
+    """
+
+    lname = models.CharField(max_length=255, blank=True, null=True)
+    fname = models.CharField(max_length=255, blank=True, null=True)
+    mname = models.CharField(max_length=255, blank=True, null=True)
+    suffix = models.CharField(max_length=255, blank=True, null=True)
+    addr1 = models.CharField(max_length=255, blank=True, null=True)
+    addr2 = models.CharField(max_length=255, blank=True, null=True)
+    city = models.CharField(max_length=255, blank=True, null=True)
+    zipcode = models.CharField(max_length=255, blank=True, null=True)
+    gender = models.CharField(max_length=1, blank=True, null=True)
+    race = models.ForeignKey(
+        Race, db_column='race', db_constraint=False,
+        on_delete=models.DO_NOTHING, blank=True, null=True)
+    birthdate = models.DateField(blank=True, null=True)
+    party = models.ForeignKey(
+        Party, db_column='party', db_constraint=False,
+        on_delete=models.DO_NOTHING, blank=True, null=True)
+    areacode = models.CharField(max_length=255, blank=True, null=True)
+    phone = models.CharField(max_length=255, blank=True, null=True)
+    email = models.CharField(max_length=255, blank=True, null=True)
+    voter_id = models.IntegerField()
+    exemption_requested = models.BooleanField(default=False)
+    registration_date = models.DateField(blank=True, null=True)
+    active = models.BooleanField(default=False)
+    county_slug = models.CharField(max_length=3, blank=True, null=True)
+    search_name = models.CharField(
+        max_length=255, blank=True, null=True, editable=False)
+
+    objects = VoterQuerySet.as_manager()
+
+    class Meta:
+        managed = False
+        db_table = 'voters_voter'
+        ordering = ['lname', 'fname']
+
+
+class VoterChange(models.Model):
+    """A change logged by delta_to_postgres, in a delta database only."""
+
+    CHANGE_TYPES = (
+        ('I', 'Inserted'),
+        ('U', 'Updated'),
+        ('D', 'Deleted'),
+    )
+    voter_id = models.CharField(max_length=255)
+    county_slug = models.CharField(max_length=255, blank=True, null=True)
+    change_type = models.CharField(max_length=1, choices=CHANGE_TYPES)
+    source_date = models.DateField()
+
+    class Meta:
+        ordering = ['-source_date', 'voter_id']
+
+    def __str__(self):
+        return '{} {} on {}'.format(
+            self.get_change_type_display(), self.voter_id, self.source_date)
@@ -0,0 +1,39 @@
+"""
+Name normalization shared by the voter loader and the Voter model.
+
+Kept free of settings and env vars, so load_county_voters.py and
+a Django project can both import it.
+"""
+
+import functools
+import string
+import unicodedata
+
+# Dropped outright, so O'BRIEN matches OBRIEN and ST. JOHN matches ST JOHN
+JOINING_PUNCTUATION = "'`."
+PUNCTUATION = str.maketrans(
+    {
+        character: "" if character in JOINING_PUNCTUATION else " "
+        for character in string.punctuation
+    }
+)
+NAME_CACHE_SIZE = 1 << 16  # common names repeat across a county file
+
+
+@functools.lru_cache(maxsize=NAME_CACHE_SIZE)
+def normalize_name(*parts):
+    """
+    Join name parts into one string for searching and matching names.
+
+    Letters are uppercased and stripped of accents, apostrophes and
+    periods are dropped, other punctuation becomes a space and white
+    space is collapsed: ("de la Cruz-Peña", "José") -> "DE LA CRUZ PENA JOSE".
+    """
+    name = " ".join(part for part in parts if part)
+    if not name.isascii():
+        name = "".join(
+            character
+            for character in unicodedata.normalize("NFKD", name)
+            if not unicodedata.combining(character)
+        )
+    return " ".join(name.upper().translate(PUNCTUATION).split())
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+"""
+A local stand-in for the PANDA API, for testing and benchmarking exports.
+
+Serves the dataset and data endpoints that load_county_voters.py and the
+citations loader use, keeping rows in memory. Each request can be slowed
+by a fixed latency, failed at random with a 503, and held to a shared
+rows-per-second cap, so exporter settings can be tuned offline.
+Point PANDA_BASE (or PANDA_BASE_URL for citations) at it.
+Usage:
+
+python panda_standin.py --port=8000 --latency=0.05 --error-rate=0.01
+python panda_standin.py --rows-per-sec=20000
+"""
+
+import gzip
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import load_county_voters as lcv
+
+DATASET_PATH = re.compile(r"^/api/1\.0/dataset/([^/]+)/$")
+DATA_PATH = re.compile(r"^/api/1\.0/dataset/([^/]+)/data/$")
+ROW_PATH = re.compile(r"^/api/1\.0/dataset/([^/]+)/data/([^/]+)/$")
+
+
+def percentile(values, fraction):
+    """Return the value at a fraction of the way through sorted values."""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+class PandaStandIn(ThreadingHTTPServer):
+    """
+    Hold the stand-in's datasets, settings and request stats.
+
+    - latency: seconds added to every request
+    - error_rate: share of requests answered with a 503
+    - rows_per_sec: cap on data rows accepted per second, across
+      all connections; 0 for no cap
+    """
+
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=0, error_rate=0, rows_per_sec=0):
+        super().__init__(("127.0.0.1", port), PandaStandInHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rows_per_sec = rows_per_sec
+        self.datasets = {}
+        self.lock = threading.Lock()
+        self.next_free = time.monotonic()
+        self.reset_stats()
+
+    @property
+    def url(self):
+        return "http://{}:{}".format(*self.server_address)
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = []
+
+    def record(self, method, status, ms, rows=0):
+        with self.lock:
+            self.stats.append((method, status, ms, rows))
+
+    def throttle(self, rows):
+        """Wait until the rows-per-second cap has room for rows."""
+        if not self.rows_per_sec:
+            return
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_free)
+            self.next_free = start + rows / self.rows_per_sec
+        time.sleep(start - now)
+
+    def summary(self):
+        """Sum up request stats since the last reset_stats()."""
+        with self.lock:
+            stats = list(self.stats)
+        puts = [s for s in stats if s[0] == "PUT" and s[3]]
+        latencies = [s[2] for s in puts if s[1] < 400]
+        # every injected 503 makes the exporters resend that request
+        return {
+            "requests": len(stats),
+            "batches": len(latencies),
+            "rows": sum(s[3] for s in puts if s[1] < 400),
+            "retries": sum(1 for s in stats if s[1] == 503),
+            "p50_ms": percentile(latencies, 0.5),
+            "p95_ms": percentile(latencies, 0.95),
+            "p99_ms": percentile(latencies, 0.99),
+            "max_ms": max(latencies) if latencies else None,
+        }
+
+    def start(self):
+        """Serve from a background thread and return self."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class PandaStandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def read_body(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        return body
+
+    def reply(self, status, payload=None):
+        body = b"" if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        if status != 204:
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def respond(self, method):
+        start = time.perf_counter()
+        server = self.server
+        path = self.path.split("?")[0]
+        body = self.read_body() if method == "PUT" else b""
+        time.sleep(server.latency)
+        rows = 0
+        if random.random() < server.error_rate:
+            status, payload = 503, {"error": "injected failure"}
+        else:
+            status, payload, rows = self.route(method, path, body)
+        self.reply(status, payload)
+        ms = (time.perf_counter() - start) * 1000
+        server.record(method, status, round(ms, 3), rows)
+
+    def route(self, method, path, body):
+        """Answer a request; return its status, payload and row count."""
+        datasets = self.server.datasets
+        match = DATASET_PATH.match(path)
+        if match:
+            slug = match.group(1)
+            if method == "GET":
+                if slug not in datasets:
+                    return 404, {"error": "not found"}, 0
+                return 200, {"slug": slug, "row_count": len(datasets[slug])}, 0
+            if method == "PUT":
+                created = slug not in datasets
+                datasets.setdefault(slug, {})
+                return (201 if created else 200), {"slug": slug}, 0
+        match = DATA_PATH.match(path)
+        if match and method == "PUT":
+            slug = match.group(1)
+            if slug not in datasets:
+                return 404, {"error": "no such dataset"}, 0
+            objects = json.loads(body)["objects"]
+            self.server.throttle(len(objects))
+            rows = datasets[slug]
+            for obj in objects:
+                rows[obj["external_id"]] = obj["data"]
+            return 202, {"objects": len(objects)}, len(objects)
+        match = ROW_PATH.match(path)
+        if match and method == "DELETE":
+            rows = datasets.get(match.group(1), {})
+            if rows.pop(match.group(2), None) is None:
+                return 404, {"error": "not found"}, 0
+            return 204, None, 0
+        return 405, {"error": f"{method} {path} isn't supported"}, 0
+
+    def do_GET(self):
+        self.respond("GET")
+
+    def do_PUT(self):
+        self.respond("PUT")
+
+    def do_DELETE(self):
+        self.respond("DELETE")
+
+
+if __name__ == "__main__":
+    server = PandaStandIn(
+        port=int(lcv.get_option("port", "8000")),
+        latency=float(lcv.get_option("latency", "0")),
+        error_rate=float(lcv.get_option("error-rate", "0")),
+        rows_per_sec=float(lcv.get_option("rows-per-sec", "0")),
+    )
+    print(f"PANDA stand-in listening at {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        sys.exit(0)